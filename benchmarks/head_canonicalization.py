@@ -0,0 +1,78 @@
+"""Benchmark how many heads and head-relation pairs are saved by head canonicalization.
+
+Runs inference in dry-run mode with and without merging equivalent heads and compares
+the number of heads and head-relation pairs that would be sent to the knowledge model.
+
+Usage:
+    python benchmarks/head_canonicalization.py --datapath examples/data/atomic2020/sample_test.tsv
+"""
+import argparse
+import time
+
+from kogito.inference import CommonsenseInference
+from kogito.core.trace import InferenceTrace
+
+DEFAULT_TEXTS = [
+    "PersonX becomes a great basketball player",
+    "PersonX wraps gifts for the family and runs out of paper",
+    "Hank went to the kitchen and found some shopping bags.",
+    "The dog chased the dogs of the neighbour. Dogs like to chase other dogs.",
+]
+
+
+def load_texts(datapath, limit):
+    if not datapath:
+        return DEFAULT_TEXTS
+
+    with open(datapath) as f:
+        return [line.split("\t")[0].strip() for line in f if line.strip()][:limit]
+
+
+def run(csi, texts, canonicalize_heads):
+    counters = InferenceTrace()
+    start = time.perf_counter()
+
+    for text in texts:
+        _, trace = csi.infer(
+            text,
+            dry_run=True,
+            canonicalize_heads=canonicalize_heads,
+            return_trace=True,
+        )
+        for name, value in trace.counters.items():
+            counters.count(name, value)
+
+    elapsed = time.perf_counter() - start
+
+    return counters.counters, 1000 * elapsed / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--datapath", type=str, default=None)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--language", type=str, default="en_core_web_sm")
+
+    args = parser.parse_args()
+    texts = load_texts(args.datapath, args.limit)
+    csi = CommonsenseInference(language=args.language)
+
+    results = {}
+
+    for name, canonicalize_heads in [("exact", False), ("canonical", True)]:
+        counters, latency = run(csi, texts, canonicalize_heads)
+        results[name] = counters
+        print(
+            f"{name:>10}: {counters.get('heads', 0)} heads, "
+            f"{counters.get('head_relations', 0)} pairs, {latency:.2f} ms/request"
+        )
+
+    saved = results["exact"].get("head_relations", 0) - results["canonical"].get(
+        "head_relations", 0
+    )
+    total = results["exact"].get("head_relations", 0) or 1
+    print(f"Saved pairs: {saved} ({100 * saved / total:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
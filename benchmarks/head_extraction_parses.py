@@ -0,0 +1,86 @@
+"""Benchmark spacy parse count and latency of head extraction per request.
+
+Compares extracting heads by letting every extractor parse the text on its own
+(previous behaviour) against parsing once and sharing the doc across all extractors.
+
+Usage:
+    python benchmarks/head_extraction_parses.py --datapath examples/data/atomic2020/sample_test.tsv
+"""
+import argparse
+import time
+
+from kogito.inference import CommonsenseInference
+
+DEFAULT_TEXTS = [
+    "PersonX becomes a great basketball player",
+    "PersonX wraps gifts for the family and runs out of paper",
+    "Hank went to the kitchen and found some shopping bags.",
+    "She cut up the bags to make sheets of paper. Then she wrapped the last gift.",
+]
+
+
+class CountingLanguage:
+    """Wraps a spacy pipeline and counts the number of parses"""
+
+    def __init__(self, nlp) -> None:
+        self.nlp = nlp
+        self.calls = 0
+
+    def __call__(self, text, *args, **kwargs):
+        self.calls += 1
+        return self.nlp(text, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.nlp, name)
+
+
+def load_texts(datapath, limit):
+    if not datapath:
+        return DEFAULT_TEXTS
+
+    with open(datapath) as f:
+        return [line.split("\t")[0].strip() for line in f if line.strip()][:limit]
+
+
+def run(csi, texts, shared_doc):
+    counter = CountingLanguage(csi.nlp)
+    for head_proc in csi._head_processors.values():
+        head_proc.lang = counter
+
+    start = time.perf_counter()
+
+    for text in texts:
+        if shared_doc:
+            csi._collect_heads(text, None, True, doc=counter(text))
+        else:
+            for head_proc in csi._head_processors.values():
+                head_proc.extract(text)
+
+    elapsed = time.perf_counter() - start
+
+    for head_proc in csi._head_processors.values():
+        head_proc.lang = csi.nlp
+
+    return counter.calls / len(texts), 1000 * elapsed / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--datapath", type=str, default=None)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--language", type=str, default="en_core_web_sm")
+
+    args = parser.parse_args()
+    texts = load_texts(args.datapath, args.limit)
+    csi = CommonsenseInference(language=args.language)
+
+    # Warm up the pipeline
+    run(csi, texts[:1], shared_doc=True)
+
+    for name, shared_doc in [("per-extractor parse", False), ("shared doc", True)]:
+        parses, latency = run(csi, texts, shared_doc)
+        print(f"{name:>20}: {parses:.1f} parses/request, {latency:.2f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark memory retained by the knowledge graphs of a large batch run.
+
+Runs dry-run batch inference over many texts and keeps all the resulting graphs, as corpus jobs
+accumulating results do. Memory is measured with ``tracemalloc`` once with the offset-based head
+entities returned by kogito and once with the heads holding live spacy spans, which keep their docs alive.
+
+Usage:
+    python benchmarks/head_memory.py --datapath examples/data/atomic2020/sample_test.tsv --limit 2000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from kogito.core.head import HeadEntity
+from kogito.inference import CommonsenseInference
+
+DEFAULT_TEXTS = [
+    "PersonX becomes a great basketball player",
+    "PersonX wraps gifts for the family and runs out of paper",
+    "Hank went to the kitchen and found some shopping bags.",
+    "She cut up the bags to make sheets of paper. Then she wrapped the last gift.",
+]
+
+
+def load_texts(datapath, limit):
+    if not datapath:
+        # Number the default texts so that every text is parsed and kept separately
+        return [
+            f"{DEFAULT_TEXTS[idx % len(DEFAULT_TEXTS)]} ({idx})" for idx in range(limit)
+        ]
+
+    with open(datapath) as f:
+        return [line.split("\t")[0].strip() for line in f if line.strip()][:limit]
+
+
+def attach_spans(csi, graphs, texts):
+    # Previous behaviour: every head holds a span of its parsed doc
+    for graph, doc in zip(graphs, csi.nlp.pipe(texts)):
+        if graph is None:
+            continue
+
+        for kg in graph:
+            if isinstance(kg.head.entity, HeadEntity):
+                kg.head.entity = kg.head.entity.materialize(doc)
+
+
+def run(csi, texts, batch_size, spans):
+    gc.collect()
+    tracemalloc.start()
+
+    graphs = csi.infer_batch(texts, dry_run=True, batch_size=batch_size)
+
+    if spans:
+        attach_spans(csi, graphs, texts)
+
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    num_tuples = sum(len(graph) for graph in graphs if graph is not None)
+    del graphs
+    gc.collect()
+
+    return current, peak, num_tuples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--datapath", type=str, default=None)
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--language", type=str, default="en_core_web_sm")
+
+    args = parser.parse_args()
+
+    texts = load_texts(args.datapath, args.limit)
+    csi = CommonsenseInference(language=args.language)
+    # Warm up the pipeline
+    csi.infer_batch(texts[:10], dry_run=True)
+
+    for name, spans in [("offset entities", False), ("spacy spans", True)]:
+        current, peak, num_tuples = run(csi, texts, args.batch_size, spans)
+        print(
+            f"{name:>16}: {current / 2**20:.1f} MiB retained, {peak / 2**20:.1f} MiB peak "
+            f"for {num_tuples} tuples of {len(texts)} texts"
+        )
+
+
+if __name__ == "__main__":
+    main()
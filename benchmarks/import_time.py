@@ -0,0 +1,71 @@
+"""Benchmark import time of kogito modules and check for eagerly imported heavy dependencies.
+
+Each module is imported in a fresh interpreter, so that timings are not affected by
+previously imported modules. Exits with a non-zero status if importing a module pulls in
+any of the heavy dependencies that should only be loaded on first use.
+
+Usage:
+    python benchmarks/import_time.py
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "kogito.core.knowledge",
+    "kogito.core.relation",
+    "kogito.core.processors.relation",
+    "kogito.inference",
+]
+
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "pytorch_lightning",
+    "openai",
+    "pandas",
+    "rouge_score",
+    "sacrebleu",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"elapsed": elapsed, "heavy": heavy}}))
+"""
+
+
+def probe(module):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", type=str, nargs="+", default=DEFAULT_MODULES)
+
+    args = parser.parse_args()
+    failed = False
+
+    for module in args.modules:
+        result = probe(module)
+        heavy = ", ".join(result["heavy"]) or "none"
+        print(
+            f"{module:>35}: {1000 * result['elapsed']:8.1f} ms, heavy imports: {heavy}"
+        )
+        failed = failed or bool(result["heavy"])
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark spacy parse throughput per pipeline profile.
+
+Parses the same texts with the components needed by each head extractor profile
+(see ``kogito.core.language``) and with the full pipeline.
+
+Usage:
+    python benchmarks/language_profiles.py --language en_core_web_sm --repeat 50
+"""
+import argparse
+import time
+
+import spacy
+
+from kogito.core.language import profile_disable
+
+DEFAULT_TEXTS = [
+    "PersonX becomes a great basketball player",
+    "PersonX wraps gifts for the family and runs out of paper",
+    "Hank went to the kitchen and found some shopping bags.",
+    "She cut up the bags to make sheets of paper. Then she wrapped the last gift.",
+]
+
+PROFILES = {
+    "full": None,
+    "sentences": {"sentences"},
+    "noun phrases": {"pos", "parse"},
+    "verb phrases": {"lemma", "parse"},
+    "all heads": {"sentences", "pos", "lemma", "parse"},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--language", type=str, default="en_core_web_sm")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=64)
+
+    args = parser.parse_args()
+
+    nlp = spacy.load(args.language, exclude=["ner"])
+
+    for name in nlp.disabled:
+        nlp.enable_pipe(name)
+
+    texts = DEFAULT_TEXTS * args.repeat
+
+    for name, requirements in PROFILES.items():
+        disable = profile_disable(nlp, requirements)
+        # Warm up the enabled components
+        list(nlp.pipe(DEFAULT_TEXTS, disable=disable))
+
+        start = time.perf_counter()
+        for _ in nlp.pipe(texts, batch_size=args.batch_size, disable=disable):
+            pass
+        elapsed = time.perf_counter() - start
+
+        enabled = [pipe for pipe in nlp.pipe_names if pipe not in disable]
+        print(f"{name:>15}: {len(texts) / elapsed:.1f} texts/s ({', '.join(enabled)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark CPU throughput of multi-process inference with and without thread budgets.
+
+Starts the given number of worker processes, each loading its own model and running
+inference over the same texts, once with library defaults (every worker uses all cores)
+and once with the cores split between workers by ``ResourceConfig``.
+
+Usage:
+    python benchmarks/thread_budget.py --workers 4 --model comet-bart
+"""
+import argparse
+import multiprocessing
+import time
+
+DEFAULT_TEXTS = [
+    "PersonX becomes a great basketball player",
+    "PersonX wraps gifts for the family and runs out of paper",
+    "Hank went to the kitchen and found some shopping bags.",
+    "She cut up the bags to make sheets of paper. Then she wrapped the last gift.",
+]
+
+
+def worker(args, use_budget, ready, start_event, results):
+    from kogito.cli import load_model
+    from kogito.core.resources import ResourceConfig
+    from kogito.inference import CommonsenseInference
+
+    resources = None
+
+    if use_budget:
+        resources = ResourceConfig(num_threads=args.threads, num_workers=args.workers)
+        resources.apply()
+
+    csi = CommonsenseInference(language=args.language, resources=resources)
+    model = load_model(args.model, args.model_path)
+
+    # Warm up the pipeline and the model
+    csi.infer(DEFAULT_TEXTS[0], model)
+    ready.put(True)
+    start_event.wait()
+
+    num_pairs = 0
+
+    for _ in range(args.repeat):
+        for text in DEFAULT_TEXTS:
+            _, trace = csi.infer(text, model, return_trace=True)
+            num_pairs += trace.counters.get("head_relations", 0)
+
+    results.put(num_pairs)
+
+
+def run(args, use_budget):
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    start_event = context.Event()
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=worker, args=(args, use_budget, ready, start_event, results)
+        )
+        for _ in range(args.workers)
+    ]
+
+    for process in workers:
+        process.start()
+
+    # Wait for all workers to load their models before starting the clock
+    for _ in workers:
+        ready.get()
+
+    start = time.perf_counter()
+    start_event.set()
+    num_pairs = sum(results.get() for _ in workers)
+    elapsed = time.perf_counter() - start
+
+    for process in workers:
+        process.join()
+
+    return num_pairs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--model", type=str, default="comet-bart")
+    parser.add_argument("--model-path", type=str, default=None)
+    parser.add_argument("--language", type=str, default="en_core_web_sm")
+    parser.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args()
+
+    for name, use_budget in [("defaults", False), ("thread budget", True)]:
+        throughput = run(args, use_budget)
+        print(f"{name:>15}: {throughput:.1f} pairs/s with {args.workers} workers")
+
+
+if __name__ == "__main__":
+    main()
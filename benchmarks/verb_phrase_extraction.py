@@ -0,0 +1,86 @@
+"""Benchmark verb phrase extraction on long, already parsed documents.
+
+Compares the verb phrase part of the ``kogito_heads`` token loop against ``DependencyVerbPhraseHeadExtractor``
+matching the same verb and object patterns, so both sides extract the same heads. Matching all the
+default patterns is timed separately to show the cost of the richer heads. Parsing is excluded from the timings.
+
+Usage:
+    python benchmarks/verb_phrase_extraction.py --language en_core_web_sm --doc-size 200
+"""
+import argparse
+import time
+
+import spacy
+
+from kogito.core.processors.head import (
+    VERB_PHRASE_PATTERNS,
+    DependencyVerbPhraseHeadExtractor,
+    _add_verb_phrase_heads,
+)
+
+DEFAULT_TEXTS = [
+    "PersonX becomes a great basketball player",
+    "PersonX wraps gifts for the family and runs out of paper",
+    "Hank went to the kitchen and found some shopping bags.",
+    "She cut up the bags to make sheets of paper. Then she wrapped the last gift.",
+]
+
+
+def token_loop(doc):
+    heads = []
+    head_texts = set()
+
+    for token in doc:
+        if token.pos_ == "VERB":
+            _add_verb_phrase_heads(heads, head_texts, token)
+
+    return heads
+
+
+def timeit(fn, docs, repeat):
+    start = time.perf_counter()
+    num_heads = 0
+
+    for _ in range(repeat):
+        for doc in docs:
+            num_heads = fn(doc)
+
+    return (time.perf_counter() - start) / (repeat * len(docs)), num_heads
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--language", type=str, default="en_core_web_sm")
+    parser.add_argument("--doc-size", type=int, default=200)
+    parser.add_argument("--num-docs", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=10)
+
+    args = parser.parse_args()
+
+    nlp = spacy.load(args.language, exclude=["ner"])
+    long_text = " ".join(
+        text if text.endswith(".") else f"{text}." for text in DEFAULT_TEXTS
+    )
+    docs = list(nlp.pipe([" ".join([long_text] * args.doc_size)] * args.num_docs))
+    same_extractor = DependencyVerbPhraseHeadExtractor(
+        "dependency_verb_phrase_extractor",
+        patterns={label: VERB_PHRASE_PATTERNS[label] for label in ("verb", "object")},
+    )
+    all_extractor = DependencyVerbPhraseHeadExtractor(
+        "dependency_verb_phrase_extractor"
+    )
+
+    for name, fn in [
+        ("token loop", lambda doc: len(token_loop(doc))),
+        ("matcher", lambda doc: len(same_extractor.extract(doc.text, doc))),
+        (
+            "matcher (all patterns)",
+            lambda doc: len(all_extractor.extract(doc.text, doc)),
+        ),
+    ]:
+        latency, num_heads = timeit(fn, docs, args.repeat)
+        print(f"{name:>22}: {latency * 1000:.2f} ms/doc, {num_heads} verb phrase heads")
+
+
+if __name__ == "__main__":
+    main()
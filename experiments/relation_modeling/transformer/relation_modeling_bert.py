@@ -8,6 +8,7 @@ from kogito.core.processors.models.bert import (
     BERTConfig,
     BERTHeadDataset,
     BERTClassifier,
+    get_tokenizer,
 )
 
 MODEL_TYPE = "uncased"
@@ -21,13 +22,20 @@ if __name__ == "__main__":
     train_df = load_fdata(f"data/atomic_ood2/{DATASET_TYPE}/train_{DATASET_TYPE}.csv")
     val_df = load_data("data/atomic2020_data-feb2021/dev.tsv", multi_label=True)
     test_df = load_fdata(f"data/atomic_ood2/{DATASET_TYPE}/test_{DATASET_TYPE}.csv")
-    train_data = BERTHeadDataset(train_df, tokenizer_type=MODEL_TYPE)
-    val_data = BERTHeadDataset(val_df, tokenizer_type=MODEL_TYPE)
-    test_data = BERTHeadDataset(test_df, tokenizer_type=MODEL_TYPE)
+    tokenizer = get_tokenizer(MODEL_TYPE)
+    train_data = BERTHeadDataset(train_df, tokenizer=tokenizer)
+    val_data = BERTHeadDataset(val_df, tokenizer=tokenizer)
+    test_data = BERTHeadDataset(test_df, tokenizer=tokenizer)
 
-    train_dataloader = DataLoader(train_data, batch_size=BATCH_SIZE, shuffle=True)
-    val_dataloader = DataLoader(val_data, batch_size=BATCH_SIZE)
-    test_dataloader = DataLoader(test_data, batch_size=BATCH_SIZE, shuffle=True)
+    train_dataloader = DataLoader(
+        train_data, batch_size=BATCH_SIZE, shuffle=True, collate_fn=train_data.collate
+    )
+    val_dataloader = DataLoader(
+        val_data, batch_size=BATCH_SIZE, collate_fn=val_data.collate
+    )
+    test_dataloader = DataLoader(
+        test_data, batch_size=BATCH_SIZE, shuffle=True, collate_fn=test_data.collate
+    )
 
     timestamp = get_timestamp()
     emb_txt = "frozen" if FREEZE_EMB else "finetune"
@@ -9,6 +9,7 @@ from kogito.core.processors.models.distilbert import (
     DistilBERTConfig,
     DistilBERTHeadDataset,
     DistilBERTClassifier,
+    get_tokenizer,
 )
 
 MODEL_TYPE = "uncased"
@@ -23,13 +24,20 @@ if __name__ == "__main__":
     train_df = load_fdata(f"data/atomic_ood2/{DATASET_TYPE}/train_{DATASET_TYPE}.csv")
     val_df = load_data("data/atomic2020_data-feb2021/dev.tsv", multi_label=True)
     test_df = load_fdata(f"data/atomic_ood2/{DATASET_TYPE}/test_{DATASET_TYPE}.csv")
-    train_data = DistilBERTHeadDataset(train_df, tokenizer_type=MODEL_TYPE)
-    val_data = DistilBERTHeadDataset(val_df, tokenizer_type=MODEL_TYPE)
-    test_data = DistilBERTHeadDataset(test_df, tokenizer_type=MODEL_TYPE)
+    tokenizer = get_tokenizer(MODEL_TYPE)
+    train_data = DistilBERTHeadDataset(train_df, tokenizer=tokenizer)
+    val_data = DistilBERTHeadDataset(val_df, tokenizer=tokenizer)
+    test_data = DistilBERTHeadDataset(test_df, tokenizer=tokenizer)
 
-    train_dataloader = DataLoader(train_data, batch_size=BATCH_SIZE, shuffle=True)
-    val_dataloader = DataLoader(val_data, batch_size=BATCH_SIZE)
-    test_dataloader = DataLoader(test_data, batch_size=BATCH_SIZE, shuffle=True)
+    train_dataloader = DataLoader(
+        train_data, batch_size=BATCH_SIZE, shuffle=True, collate_fn=train_data.collate
+    )
+    val_dataloader = DataLoader(
+        val_data, batch_size=BATCH_SIZE, collate_fn=val_data.collate
+    )
+    test_dataloader = DataLoader(
+        test_data, batch_size=BATCH_SIZE, shuffle=True, collate_fn=test_data.collate
+    )
 
     emb_txt = "frozen" if FREEZE_EMB else "finetune"
 
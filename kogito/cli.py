@@ -0,0 +1,329 @@
+"""Command line interface for corpus-scale commonsense inference.
+
+Example:
+    kogito infer --input corpus.jsonl --output out.jsonl --workers 4 --model comet-bart
+
+Input is a JSON lines file where each line has a text field (``text`` by default) and optionally,
+an id field (``id`` by default). Input lines are sharded across worker processes, each holding
+its own inference module and model. Every worker writes its results incrementally to a shard file
+and records its progress, so that an interrupted run resumes where it stopped when the same command
+is run again. Once all shards are complete, they are merged into the output file in input order.
+"""
+from typing import List, Optional
+import argparse
+import heapq
+import json
+import multiprocessing
+import os
+import shutil
+from contextlib import contextmanager
+
+from kogito.core.model import KnowledgeModel
+from kogito.core.resources import ResourceConfig
+
+MODEL_CHOICES = ["comet-bart", "comet-gpt2", "gpt2"]
+MANIFEST_FILE = "manifest.json"
+
+
+def load_model(name: str, model_path: Optional[str] = None) -> KnowledgeModel:
+    """Load a knowledge model by its CLI name
+
+    Args:
+        name (str): Model name. One of comet-bart, comet-gpt2, gpt2.
+        model_path (Optional[str], optional): HuggingFace model name or local model path.
+                                              Defaults to the pretrained kogito model.
+
+    Raises:
+        ValueError: if model name is not recognized
+
+    Returns:
+        KnowledgeModel: Loaded knowledge model
+    """
+    if name == "comet-bart":
+        from kogito.models.bart.comet import COMETBART
+
+        return COMETBART.from_pretrained(model_path or "mismayil/comet-bart-ai2")
+    elif name == "comet-gpt2":
+        from kogito.models.gpt2.comet import COMETGPT2
+
+        return COMETGPT2.from_pretrained(model_path or "mismayil/comet-gpt2-ai2")
+    elif name == "gpt2":
+        from kogito.models.gpt2.zeroshot import GPT2Zeroshot
+
+        return GPT2Zeroshot.from_pretrained(model_path or "gpt2")
+
+    raise ValueError(f"Unknown model: {name}")
+
+
+def _shard_path(parts_dir: str, shard: int) -> str:
+    return os.path.join(parts_dir, f"shard-{shard}.jsonl")
+
+
+def _progress_path(parts_dir: str, shard: int) -> str:
+    return os.path.join(parts_dir, f"shard-{shard}.progress.json")
+
+
+def _write_json_atomic(path: str, content: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(content, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_progress(parts_dir: str, shard: int) -> dict:
+    path = _progress_path(parts_dir, shard)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"done": 0, "offset": 0, "complete": False}
+
+
+def _infer_shard(shard: int, args: argparse.Namespace) -> None:
+    from kogito.inference import CommonsenseInference
+
+    parts_dir = f"{args.output}.parts"
+    progress = _read_progress(parts_dir, shard)
+
+    if progress["complete"]:
+        return
+
+    # Share the cores between workers instead of letting every worker use all of them
+    resources = ResourceConfig(num_threads=args.threads, num_workers=args.workers)
+    resources.apply()
+
+    csi = CommonsenseInference(language=args.language, resources=resources)
+    model = None if args.dry_run else load_model(args.model, args.model_path)
+    cache = None
+
+    if args.cache_db:
+        from kogito.core.cache import GenerationCache
+
+        # Workers share a single database, so it is reused by runs with any number of workers
+        cache = GenerationCache(db_path=args.cache_db)
+
+    with open(_shard_path(parts_dir, shard), "a+b") as shard_file:
+        # Drop any partial output written after the last recorded progress
+        shard_file.truncate(progress["offset"])
+        shard_file.seek(progress["offset"])
+
+        def flush(batch: List[dict]) -> None:
+            graphs = csi.infer_batch(
+                [record.get(args.text_field) for record in batch],
+                model=model,
+                extract_heads=not args.no_extract_heads,
+                match_relations=not args.no_match_relations,
+                batch_size=args.batch_size,
+                cache=cache,
+            )
+
+            for record, graph in zip(batch, graphs):
+                result = {
+                    "index": record["_index"],
+                    "id": record.get(args.id_field, record["_index"]),
+                    "graph": [kg.to_json() for kg in graph] if graph else [],
+                }
+                shard_file.write((json.dumps(result) + "\n").encode("utf-8"))
+
+            shard_file.flush()
+            os.fsync(shard_file.fileno())
+            progress["done"] += len(batch)
+            progress["offset"] = shard_file.tell()
+            _write_json_atomic(_progress_path(parts_dir, shard), progress)
+
+        batch = []
+        shard_position = 0
+
+        with open(args.input) as input_file, _progress_bar(
+            desc=f"Shard {shard}", position=shard, initial=progress["done"]
+        ) as pbar:
+            for index, line in enumerate(input_file):
+                if index % args.workers != shard or not line.strip():
+                    continue
+
+                shard_position += 1
+
+                if shard_position <= progress["done"]:
+                    continue
+
+                record = json.loads(line)
+                record["_index"] = index
+                batch.append(record)
+
+                if len(batch) >= args.batch_size:
+                    flush(batch)
+                    pbar.update(len(batch))
+                    batch = []
+
+            if batch:
+                flush(batch)
+                pbar.update(len(batch))
+
+    progress["complete"] = True
+    _write_json_atomic(_progress_path(parts_dir, shard), progress)
+
+
+class _NoProgressBar:
+    def update(self, n: int = 1) -> None:
+        pass
+
+
+@contextmanager
+def _progress_bar(**kwargs):
+    # tqdm is optional, progress is still recorded without it
+    try:
+        from tqdm import tqdm
+    except ImportError:
+        yield _NoProgressBar()
+        return
+
+    with tqdm(**kwargs) as pbar:
+        yield pbar
+
+
+def _prepare_parts(args: argparse.Namespace) -> str:
+    parts_dir = f"{args.output}.parts"
+    manifest_path = os.path.join(parts_dir, MANIFEST_FILE)
+    # Arguments that change the results, resuming with different values would mix outputs of two runs
+    manifest = {
+        "input": os.path.abspath(args.input),
+        "workers": args.workers,
+        "model": args.model,
+        "model_path": args.model_path,
+        "language": args.language,
+        "text_field": args.text_field,
+        "id_field": args.id_field,
+        "extract_heads": not args.no_extract_heads,
+        "match_relations": not args.no_match_relations,
+        "dry_run": args.dry_run,
+    }
+
+    if args.overwrite and os.path.exists(parts_dir):
+        shutil.rmtree(parts_dir)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous_manifest = json.load(f)
+
+        if previous_manifest != manifest:
+            raise ValueError(
+                f"Found an unfinished run in {parts_dir} with different arguments. "
+                "Use --overwrite to start a new run."
+            )
+    else:
+        os.makedirs(parts_dir, exist_ok=True)
+        _write_json_atomic(manifest_path, manifest)
+
+    return parts_dir
+
+
+def _merge_parts(parts_dir: str, args: argparse.Namespace) -> None:
+    shard_files = [open(_shard_path(parts_dir, shard)) for shard in range(args.workers)]
+
+    try:
+        results = heapq.merge(
+            *[(json.loads(line) for line in f) for f in shard_files],
+            key=lambda result: result["index"],
+        )
+        with open(args.output, "w") as output_file:
+            for result in results:
+                del result["index"]
+                output_file.write(json.dumps(result) + "\n")
+    finally:
+        for f in shard_files:
+            f.close()
+
+    shutil.rmtree(parts_dir)
+
+
+def infer(args: argparse.Namespace) -> None:
+    """Run sharded multi-process inference over a JSON lines corpus
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    parts_dir = _prepare_parts(args)
+
+    if args.workers == 1:
+        _infer_shard(0, args)
+    else:
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=_infer_shard, args=(shard, args))
+            for shard in range(args.workers)
+        ]
+
+        for worker in workers:
+            worker.start()
+
+        for worker in workers:
+            worker.join()
+
+        failed = [shard for shard, worker in enumerate(workers) if worker.exitcode]
+
+        if failed:
+            raise RuntimeError(
+                f"Shards {failed} failed. Run the same command again to resume."
+            )
+
+    _merge_parts(parts_dir, args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="kogito",
+        description="A Python NLP Commonsense Knowledge Inference Toolkit",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    infer_parser = subparsers.add_parser(
+        "infer", help="Run commonsense inference over a JSON lines corpus"
+    )
+    infer_parser.add_argument("--input", type=str, required=True)
+    infer_parser.add_argument("--output", type=str, required=True)
+    infer_parser.add_argument("--workers", type=int, default=1)
+    infer_parser.add_argument(
+        "--model", type=str, choices=MODEL_CHOICES, default="comet-bart"
+    )
+    infer_parser.add_argument("--model-path", type=str, default=None)
+    infer_parser.add_argument("--language", type=str, default="en_core_web_sm")
+    infer_parser.add_argument("--batch-size", type=int, default=16)
+    infer_parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Total number of CPU threads shared by all workers. Defaults to the number of CPUs.",
+    )
+    infer_parser.add_argument("--text-field", type=str, default="text")
+    infer_parser.add_argument("--id-field", type=str, default="id")
+    infer_parser.add_argument(
+        "--cache-db",
+        type=str,
+        default=None,
+        help="SQLite database of generations shared by all workers and reused across runs.",
+    )
+    infer_parser.add_argument("--no-extract-heads", action="store_true")
+    infer_parser.add_argument("--no-match-relations", action="store_true")
+    infer_parser.add_argument("--dry-run", action="store_true")
+    infer_parser.add_argument("--overwrite", action="store_true")
+    infer_parser.set_defaults(func=infer)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers should be at least 1")
+
+    if args.threads is not None and args.threads < 1:
+        parser.error("--threads should be at least 1")
+
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
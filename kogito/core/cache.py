@@ -0,0 +1,367 @@
+from typing import Any, Dict, Hashable, List, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from kogito.core.knowledge import Knowledge, KnowledgeGraph
+from kogito.core.model import KnowledgeModel
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache with least-recently-used eviction and optional expiration.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None) -> None:
+        """Initialize an LRU cache
+
+        Args:
+            max_size (int, optional): Maximum number of entries to keep. Defaults to 10000.
+            ttl (Optional[float], optional): Number of seconds an entry stays valid after it is set.
+                                             Defaults to None, i.e. entries never expire.
+
+        Raises:
+            ValueError: if max_size or ttl is not positive
+        """
+        if max_size <= 0:
+            raise ValueError("Cache size should be positive")
+
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Cache TTL should be positive")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        # Values are stored with their expiration time
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value and mark it as recently used
+
+        Args:
+            key (Hashable): Cache key.
+            default (Any, optional): Value to return if key is not cached. Defaults to None.
+
+        Returns:
+            Any: Cached value or default
+        """
+        with self._lock:
+            if not self._is_valid(key):
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache a value, evicting the least recently used entries if needed
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to cache.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._is_valid(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getstate__(self) -> dict:
+        # Locks cannot be pickled, a copy gets its own lock
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _is_valid(self, key: Hashable) -> bool:
+        # Expired entries are removed lazily, when they are looked up
+        if key not in self._entries:
+            return False
+
+        expires_at = self._entries[key][1]
+
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return False
+
+        return True
+
+
+class SQLiteCache:
+    """
+    Persistent key-value cache backed by a SQLite database.
+    Values have to be JSON serializable. The database is in write-ahead logging mode,
+    so that it can be shared by several processes.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize a SQLite cache
+
+        Args:
+            path (str): Path to the database file. It will be created if it does not exist.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Writers of other processes are waited for instead of failing right away
+        self._connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+
+        with self._lock:
+            # Readers do not block the writer and the other way around
+            self._connection.execute("PRAGMA journal_mode=WAL")
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a cached value
+
+        Args:
+            key (str): Cache key.
+            default (Any, optional): Value to return if key is not cached. Defaults to None.
+
+        Returns:
+            Any: Cached value or default
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return default
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache a value
+
+        Args:
+            key (str): Cache key.
+            value (Any): JSON serializable value to cache.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache")
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class GenerationCache:
+    """
+    Memoizes knowledge model generations.
+    Generations are keyed by the model fingerprint, head text, relation and the generation arguments.
+    Entries are kept in an in-memory LRU cache and optionally, in a persistent SQLite database.
+    """
+
+    def __init__(self, max_size: int = 10000, db_path: Optional[str] = None) -> None:
+        """Initialize a generation cache
+
+        Args:
+            max_size (int, optional): Maximum number of generations to keep in memory. Defaults to 10000.
+            db_path (Optional[str], optional): Path to a SQLite database to persist generations to.
+                                               Defaults to None.
+        """
+        self.memory = LRUCache(max_size)
+        self.disk = SQLiteCache(db_path) if db_path else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Get cached tails
+
+        Args:
+            key (str): Generation key.
+
+        Returns:
+            Optional[List[str]]: Cached tails if any
+        """
+        tails = self.memory.get(key)
+
+        if tails is None and self.disk is not None:
+            tails = self.disk.get(key)
+            if tails is not None:
+                self.memory.set(key, tails)
+
+        return list(tails) if tails is not None else None
+
+    def set(self, key: str, tails: List[str]) -> None:
+        """Cache generated tails
+
+        Args:
+            key (str): Generation key.
+            tails (List[str]): Generated tails.
+        """
+        self.memory.set(key, list(tails))
+
+        if self.disk is not None:
+            self.disk.set(key, list(tails))
+
+    def clear(self) -> None:
+        """Remove all cached generations"""
+        self.memory.clear()
+
+        if self.disk is not None:
+            self.disk.clear()
+
+    def generate(
+        self, model: KnowledgeModel, input_graph: KnowledgeGraph, **kwargs
+    ) -> KnowledgeGraph:
+        """Generate inferences from the model for cache misses only.
+        Knowledge tuples that already have tails are treated as examples (e.g. a sample graph for GPT-3),
+        are never cached and are sent to the model together with the cache misses.
+        Output only holds the knowledge without tails in the input graph, whether or not the model was called.
+
+        Args:
+            model (KnowledgeModel): Knowledge model to use for generation.
+            input_graph (KnowledgeGraph): Input dataset.
+            kwargs: Additional arguments to pass to the ``KnowledgeModel.generate()`` method.
+
+        Raises:
+            ValueError: if the model has no fingerprint (see :func:`model_fingerprint`)
+
+        Returns:
+            KnowledgeGraph: Completed knowledge graph
+        """
+        input_kgs = list(input_graph)
+        samples = [kg for kg in input_kgs if kg.tails]
+        fingerprint = model_fingerprint(model)
+        generation_args = dict(kwargs)
+
+        if samples:
+            generation_args["_samples"] = sorted(
+                json.dumps(kg.to_json()) for kg in samples
+            )
+
+        outputs: List[Optional[Knowledge]] = [None] * len(input_kgs)
+        misses: Dict[str, List[int]] = {}
+        num_hits = 0
+        num_misses = 0
+
+        for index, kg in enumerate(input_kgs):
+            if kg.tails:
+                continue
+
+            key = generation_key(fingerprint, kg, generation_args)
+            tails = self.get(key)
+
+            if tails is not None:
+                output_kg = kg.copy()
+                output_kg.tails = tails
+                outputs[index] = output_kg
+                num_hits += 1
+            else:
+                misses.setdefault(key, []).append(index)
+                num_misses += 1
+
+        with self._lock:
+            self.hits += num_hits
+            self.misses += num_misses
+
+        if misses:
+            miss_graph = KnowledgeGraph(
+                [input_kgs[indices[0]] for indices in misses.values()] + samples
+            )
+
+            for output_kg in model.generate(miss_graph, **kwargs):
+                key = generation_key(fingerprint, output_kg, generation_args)
+
+                if key in misses:
+                    self.set(key, output_kg.tails)
+                    for index in misses[key]:
+                        kg = output_kg.copy()
+                        kg.head = input_kgs[index].head
+                        outputs[index] = kg
+
+        # Samples (and anything else the model returns) are left out, so that cache hits and misses
+        # produce the same graph
+        return KnowledgeGraph([kg for kg in outputs if kg is not None])
+
+
+def model_fingerprint(model: KnowledgeModel) -> str:
+    """Compute a fingerprint of a knowledge model used in generation keys.
+    Models can define a custom ``fingerprint`` attribute, otherwise it is derived from
+    the model class and the pretrained model name or path.
+
+    Args:
+        model (KnowledgeModel): Knowledge model.
+
+    Raises:
+        ValueError: if the model has neither a fingerprint nor a model name or path
+
+    Returns:
+        str: Model fingerprint
+    """
+    fingerprint = getattr(model, "fingerprint", None)
+
+    if fingerprint:
+        return str(fingerprint)
+
+    name = getattr(model, "model_name", None) or getattr(
+        getattr(model, "model", None), "name_or_path", None
+    )
+
+    if not name:
+        # Object ids are reused and persisted generations outlive the process, so they cannot identify a model
+        raise ValueError(
+            f"Cannot fingerprint model {type(model).__name__}, "
+            "set its fingerprint attribute to use a generation cache"
+        )
+
+    return f"{type(model).__module__}.{type(model).__name__}:{name}"
+
+
+def generation_key(fingerprint: str, kg: Knowledge, generation_args: dict) -> str:
+    """Compute the cache key of a generation
+
+    Args:
+        fingerprint (str): Model fingerprint.
+        kg (Knowledge): Knowledge to generate tails for.
+        generation_args (dict): Generation arguments.
+
+    Returns:
+        str: Generation key
+    """
+    key = json.dumps(
+        [fingerprint, str(kg.head), str(kg.relation), generation_args],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
@@ -1,11 +1,12 @@
 from pathlib import Path
 from typing import Dict
 import warnings
+import numpy as np
 import torch
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, Sampler
 
 from kogito.core.knowledge import GEN_TOKEN, EOS_TOKEN
-from kogito.core.utils import encode_line, trim_batch, SortishSampler
+from kogito.core.utils import encode_line, trim_batch
 
 
 class KnowledgeDataset(Dataset):
@@ -188,3 +189,41 @@ class MBartDataset(Seq2SeqDataset):
             max_length=self.max_source_length,
         )
         return batch_encoding.data
+
+
+class SortishSampler(Sampler):
+    "Go through the text data by order of src length with a bit of randomness. From fastai repo."
+
+    def __init__(self, data, batch_size):
+        self.data, self.bs = data, batch_size
+
+    def key(self, i):
+        return self.data[i]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        idxs = np.random.permutation(len(self.data))
+        sz = self.bs * 50
+        ck_idx = [idxs[i : i + sz] for i in range(0, len(idxs), sz)]
+        sort_idx = np.concatenate(
+            [sorted(s, key=self.key, reverse=True) for s in ck_idx]
+        )
+        sz = self.bs
+        ck_idx = [sort_idx[i : i + sz] for i in range(0, len(sort_idx), sz)]
+        max_ck = np.argmax(
+            [self.key(ck[0]) for ck in ck_idx]
+        )  # find the chunk with the largest key,
+        ck_idx[0], ck_idx[max_ck] = (
+            ck_idx[max_ck],
+            ck_idx[0],
+        )  # then make sure it goes first.
+        if len(ck_idx) < 3:
+            return iter(np.concatenate(ck_idx))
+
+        sort_idx = np.concatenate(
+            [np.concatenate(np.random.permutation(ck_idx[1:-1])), ck_idx[-1]]
+        )
+        sort_idx = np.concatenate((ck_idx[0], sort_idx))
+        return iter(sort_idx)
@@ -1,5 +1,6 @@
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Optional, Tuple
 from enum import Enum
+import hashlib
 
 
 class KnowledgeHeadType(Enum):
@@ -13,6 +14,105 @@ class KnowledgeHeadType(Enum):
     VERB_PHRASE = "verb_phrase"
 
 
+def doc_id(doc: Any) -> str:
+    """Compute the id of a parsed doc (or its text) that head entities refer to.
+    Id depends only on the text, so a doc parsed again from the same text has the same id.
+
+    Args:
+        doc (Any): Spacy doc or text.
+
+    Returns:
+        str: Doc id
+    """
+    text = doc if isinstance(doc, str) else doc.text
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class HeadEntity:
+    """
+    Compact reference to a knowledge head in a parsed spacy doc.
+    Unlike spacy spans and tokens, it does not keep the doc alive and can be materialized on demand,
+    either from the doc it was extracted from or from a doc parsed again from the same text.
+    """
+
+    __slots__ = [
+        "doc_id",
+        "kind",
+        "start",
+        "end",
+        "start_char",
+        "end_char",
+        "tokens",
+        "lemmas",
+    ]
+
+    def __init__(
+        self,
+        doc_id: str,
+        kind: str,
+        start: int,
+        end: int,
+        start_char: int,
+        end_char: int,
+        tokens: Optional[Tuple[int, ...]] = None,
+        lemmas: Optional[Tuple[str, ...]] = None,
+    ) -> None:
+        """Initialize a head entity
+
+        Args:
+            doc_id (str): Id of the doc the head was extracted from (see :func:`doc_id`).
+            kind (str): Kind of the head, e.g. sentence, noun_phrase or verb_phrase.
+            start (int): Token offset of the head start.
+            end (int): Token offset of the head end (exclusive).
+            start_char (int): Character offset of the head start.
+            end_char (int): Character offset of the head end (exclusive).
+            tokens (Optional[Tuple[int, ...]], optional): Token offsets of a head made of
+                non-adjacent tokens, e.g. a verb and its object. Defaults to None.
+            lemmas (Optional[Tuple[str, ...]], optional): Lowercased lemmas of the head tokens
+                without punctuation, used for head canonicalization. Defaults to None.
+        """
+        self.doc_id = doc_id
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.start_char = start_char
+        self.end_char = end_char
+        self.tokens = tokens
+        self.lemmas = lemmas
+
+    def materialize(self, doc: Any) -> Any:
+        """Get the spacy entity of the head from a parsed doc
+
+        Args:
+            doc (Any): Spacy doc the head was extracted from or parsed again from the same text.
+
+        Raises:
+            ValueError: if the head was extracted from a different doc
+
+        Returns:
+            Any: Spacy span for sentences and multi-word heads, token for single-word heads
+                 and a list of tokens for heads made of non-adjacent tokens
+        """
+        if doc_id(doc) != self.doc_id:
+            raise ValueError("Head entity does not belong to the given doc")
+
+        if self.tokens is not None:
+            return [doc[idx] for idx in self.tokens]
+
+        if self.kind != "sentence" and self.end - self.start == 1:
+            return doc[self.start]
+
+        return doc[self.start : self.end]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, HeadEntity) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return f"HeadEntity(doc_id={self.doc_id}, kind={self.kind}, start={self.start}, end={self.end})"
+
+
 class KnowledgeHead:
     """
     Represents a concept of Knowledge Head.
@@ -30,7 +130,8 @@ class KnowledgeHead:
         Args:
             text (str): Head text.
             type (KnowledgeHeadType, optional): Type of a Knowledge head. Defaults to KnowledgeHeadType.TEXT.
-            entity (Any, optional): External Knowledge head entity. Defaults to None.
+            entity (Any, optional): External Knowledge head entity, e.g. a :class:`HeadEntity`
+                                    for extracted heads. Defaults to None.
             verbalizer (Optional[Callable], optional): Function to convert knowledge head to natural text.
                                                       Defaults to None.
         """
@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional, Tuple, Union
+import re
+import string
+
+from kogito.core.head import KnowledgeHead
+from kogito.core.knowledge import KnowledgeGraph
+from kogito.core.relation import KnowledgeRelation
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize head text for lookups by lowercasing it, collapsing whitespace
+    and stripping surrounding punctuation.
+
+    Args:
+        text (str): Text to normalize.
+
+    Returns:
+        str: Normalized text
+    """
+    return _WHITESPACE_RE.sub(" ", text.lower()).strip(string.punctuation + " ")
+
+
+class KnowledgeIndex:
+    """
+    Index of a reference knowledge graph (e.g. ATOMIC 2020) over head and relation pairs.
+    Tails of all knowledge tuples with the same head and relation are merged.
+    Lookups try the exact head text first and then, the normalized head text.
+    """
+
+    def __init__(self, graph: KnowledgeGraph) -> None:
+        """Build an index of a knowledge graph
+
+        Args:
+            graph (KnowledgeGraph): Reference knowledge graph.
+        """
+        self._exact: Dict[Tuple[str, str], List[str]] = {}
+        self._normalized: Dict[Tuple[str, str], List[str]] = {}
+
+        for kg in graph:
+            if not kg.tails:
+                continue
+
+            relation = str(kg.relation)
+            _add_tails(self._exact, (kg.head.text, relation), kg.tails)
+            _add_tails(
+                self._normalized, (normalize_text(kg.head.text), relation), kg.tails
+            )
+
+    def lookup(
+        self,
+        head: Union[KnowledgeHead, str],
+        relation: Union[KnowledgeRelation, str],
+    ) -> Optional[List[str]]:
+        """Find tails of a head and relation pair
+
+        Args:
+            head (Union[KnowledgeHead, str]): Knowledge head.
+            relation (Union[KnowledgeRelation, str]): Knowledge relation.
+
+        Returns:
+            Optional[List[str]]: Copy of the indexed tails or None if the pair is not covered
+        """
+        head_text = str(head).strip()
+        relation = str(relation)
+        tails = self._exact.get((head_text, relation))
+
+        if tails is None:
+            tails = self._normalized.get((normalize_text(head_text), relation))
+
+        return list(tails) if tails is not None else None
+
+    def __contains__(self, head_relation: Tuple) -> bool:
+        return self.lookup(*head_relation) is not None
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+
+def _add_tails(
+    index: Dict[Tuple[str, str], List[str]], key: Tuple[str, str], tails: List[str]
+) -> None:
+    indexed_tails = index.setdefault(key, [])
+
+    for tail in tails:
+        if tail not in indexed_tails:
+            indexed_tails.append(tail)
@@ -1,11 +1,13 @@
-from typing import List, Union, Optional
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, List, Union, Optional
 import json
 
 from kogito.core.relation import KnowledgeRelation, KnowledgeRelationType, RELATION_SIZE
 from kogito.core.head import KnowledgeHead
 from kogito.core.utils import text_to_list
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 EOS_TOKEN = "[EOS]"
 GEN_TOKEN = "[GEN]"
 PAD_TOKEN = "[PAD]"
@@ -121,13 +123,16 @@ class KnowledgeGraph:
     Represents a concept of Knowledge Graph.
     """
 
-    def __init__(self, graph: List[Knowledge]) -> None:
+    def __init__(self, graph: List[Knowledge], truncated: bool = False) -> None:
         """Initialize a knowledge graph
 
         Args:
             graph (List[Knowledge]): List of Knowledge instances
+            truncated (bool, optional): Whether the graph is partial, i.e. inference stopped early
+                                        because of a pair or time budget. Defaults to False.
         """
         self.graph = graph
+        self.truncated = truncated
         self._graph_iter = None
 
     def __iter__(self):
@@ -220,6 +225,8 @@ class KnowledgeGraph:
         Returns:
             KnowledgeGraph: An instance of KnowledgeGraph
         """
+        import pandas as pd
+
         graph_df = pd.read_csv(
             filepath,
             sep=sep,
@@ -238,7 +245,7 @@ class KnowledgeGraph:
     @classmethod
     def from_dataframe(
         cls,
-        df: pd.DataFrame,
+        df: "pd.DataFrame",
         head_col: str = "head",
         relation_col: str = "relation",
         tails_col: str = "tails",
@@ -286,12 +293,14 @@ class KnowledgeGraph:
                 lines.append(json.dumps(kg.to_json()))
             file.writelines("\n".join(lines))
 
-    def to_dataframe(self) -> pd.DataFrame:
+    def to_dataframe(self) -> "pd.DataFrame":
         """Convert knowledge graph to a pandas dataframe
 
         Returns:
             pd.DataFrame: Pandas dataframe of a knowledge graph
         """
+        import pandas as pd
+
         return pd.DataFrame([kg.to_json(only_one_tail=True) for kg in self.graph])
 
     def union(self, other: "KnowledgeGraph") -> "KnowledgeGraph":
@@ -361,3 +370,28 @@ class KnowledgeGraph:
 
         self.graph = clean_graph
         return self
+
+    def expand_aliases(
+        self, aliases: Optional[Dict[KnowledgeHead, List[KnowledgeHead]]]
+    ) -> "KnowledgeGraph":
+        """Copy the knowledge of merged heads to their aliases (see ``canonicalize_heads``).
+
+        Args:
+            aliases (Optional[Dict[KnowledgeHead, List[KnowledgeHead]]]): Merged heads by their representative.
+
+        Returns:
+            KnowledgeGraph: Graph with the knowledge of aliases following that of their representatives.
+        """
+        if not aliases:
+            return self
+
+        kg_list = []
+
+        for kg in self.graph:
+            kg_list.append(kg)
+            for alias in aliases.get(kg.head, []):
+                alias_kg = kg.copy()
+                alias_kg.head = alias
+                kg_list.append(alias_kg)
+
+        return KnowledgeGraph(kg_list, truncated=self.truncated)
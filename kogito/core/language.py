@@ -0,0 +1,219 @@
+from typing import (
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+import threading
+
+import spacy
+from spacy.language import Language
+
+#: Linguistic capabilities that processors can require from a spacy pipeline
+LANGUAGE_CAPABILITIES = ["sentences", "pos", "lemma", "parse", "entities"]
+
+#: Profile of the inference pipeline with all its components enabled, including those disabled by default
+#: (e.g. senter), and the ``kogito_heads`` component. Components are then selected per call with
+#: the ``disable`` lists of :func:`profile_disable`.
+FULL_PROFILE = "full"
+
+# Shared pipelines by language and profile, loaded once per process
+_languages: Dict[Tuple[str, Hashable], Language] = {}
+_languages_lock = threading.Lock()
+
+# Trained spacy components each capability depends on
+_CAPABILITY_COMPONENTS = {
+    "pos": {"tok2vec", "transformer", "tagger", "morphologizer", "attribute_ruler"},
+    "lemma": {
+        "tok2vec",
+        "transformer",
+        "tagger",
+        "morphologizer",
+        "attribute_ruler",
+        "lemmatizer",
+        "trainable_lemmatizer",
+    },
+    "parse": {"tok2vec", "transformer", "parser"},
+    "entities": {"tok2vec", "transformer", "ner"},
+}
+
+# Components managed by profiles, any other component (e.g. kogito_heads) is always kept
+_PROFILE_COMPONENTS = set.union(*_CAPABILITY_COMPONENTS.values(), {"senter"})
+
+
+def profile_components(
+    nlp: Language, requirements: Optional[Iterable[str]] = None
+) -> List[str]:
+    """Find the components of a spacy pipeline needed for the given capabilities.
+    Sentences are split by the dependency parser if it is needed anyway, otherwise,
+    by the much faster ``senter`` component if the pipeline has one.
+
+    Args:
+        nlp (Language): Spacy pipeline.
+        requirements (Optional[Iterable[str]], optional): Required capabilities. Available capabilities:
+            sentences, pos, lemma, parse, entities. Defaults to None, i.e. all components enabled
+            by default in the pipeline.
+
+    Raises:
+        ValueError: if an unknown capability is given
+
+    Returns:
+        List[str]: Names of the needed components in the pipeline order
+    """
+    if requirements is None:
+        needed = set(nlp.component_names) - set(nlp.disabled)
+
+        # Sentences are already split by the parser
+        if "parser" in needed:
+            needed.discard("senter")
+    else:
+        requirements = set(requirements)
+
+        if not requirements.issubset(LANGUAGE_CAPABILITIES):
+            raise ValueError(
+                f"Unknown capabilities: {requirements - set(LANGUAGE_CAPABILITIES)}"
+            )
+
+        needed = set()
+
+        for capability in requirements:
+            needed.update(_CAPABILITY_COMPONENTS.get(capability, set()))
+
+        if "sentences" in requirements and "parser" not in needed:
+            if "senter" in nlp.pipe_names:
+                needed.add("senter")
+            else:
+                needed.update(_CAPABILITY_COMPONENTS["parse"])
+
+    return [
+        name
+        for name in nlp.component_names
+        if name in needed or name not in _PROFILE_COMPONENTS
+    ]
+
+
+def profile_disable(
+    nlp: Language, requirements: Optional[Iterable[str]] = None
+) -> List[str]:
+    """Find the components of a spacy pipeline that can be disabled for the given capabilities.
+    Result can be passed as the ``disable`` argument of ``Language.__call__`` and ``Language.pipe``.
+
+    Args:
+        nlp (Language): Spacy pipeline.
+        requirements (Optional[Iterable[str]], optional): Required capabilities. Defaults to None.
+
+    Returns:
+        List[str]: Names of the components to disable
+    """
+    components = set(profile_components(nlp, requirements))
+    return [name for name in nlp.pipe_names if name not in components]
+
+
+def load_language(
+    language: str, requirements: Optional[Union[Iterable[str], str]] = None
+) -> Language:
+    """Load a spacy pipeline with only the components needed for the given capabilities.
+    Prefer :func:`get_language` to share pipelines across components.
+
+    Args:
+        language (str): Spacy language pipeline to load.
+        requirements (Optional[Union[Iterable[str], str]], optional): Required capabilities
+            or :data:`FULL_PROFILE`. Defaults to None.
+
+    Returns:
+        Language: Loaded spacy pipeline
+    """
+    nlp = spacy.load(language, exclude=["ner"])
+
+    if requirements is None:
+        return nlp
+
+    # Components disabled by default (e.g. senter) can be part of a profile
+    for name in nlp.disabled:
+        nlp.enable_pipe(name)
+
+    if requirements == FULL_PROFILE:
+        # Registers the kogito_heads component
+        from kogito.core.processors import head  # noqa: F401
+
+        # Extract heads of all default extractors in a single pass while parsing
+        nlp.add_pipe("kogito_heads")
+        return nlp
+
+    components = set(profile_components(nlp, requirements))
+
+    for name in nlp.component_names:
+        if name not in components:
+            nlp.remove_pipe(name)
+
+    return nlp
+
+
+def get_language(
+    language: str = "en_core_web_sm",
+    requirements: Optional[Union[Iterable[str], str]] = None,
+) -> Language:
+    """Get a spacy pipeline shared by all kogito components of the process.
+    Each language and profile is loaded only once, on first use, and shared pipelines
+    should not be modified.
+
+    Args:
+        language (str, optional): Spacy language pipeline. Defaults to "en_core_web_sm".
+        requirements (Optional[Union[Iterable[str], str]], optional): Required capabilities
+            (see :func:`profile_components`) or :data:`FULL_PROFILE`. Defaults to None,
+            i.e. the components enabled by default in the pipeline.
+
+    Returns:
+        Language: Shared spacy pipeline
+    """
+    key = (language, _profile_key(requirements))
+
+    with _languages_lock:
+        nlp = _languages.get(key)
+
+        if nlp is None:
+            nlp = load_language(language, requirements)
+            _languages[key] = nlp
+
+    return nlp
+
+
+def clear_languages() -> None:
+    """Drop all shared spacy pipelines, e.g. to free memory.
+    Pipelines already handed out stay usable."""
+    with _languages_lock:
+        _languages.clear()
+
+
+def _profile_key(
+    requirements: Optional[Union[Iterable[str], str]]
+) -> Optional[Union[FrozenSet[str], str]]:
+    if requirements is None or isinstance(requirements, str):
+        return requirements
+    return frozenset(requirements)
+
+
+def merge_requirements(
+    requirements: Iterable[Optional[Set[str]]],
+) -> Optional[Set[str]]:
+    """Merge the capability requirements of several processors.
+
+    Args:
+        requirements (Iterable[Optional[Set[str]]]): Requirements of each processor, None if unknown.
+
+    Returns:
+        Optional[Set[str]]: Merged requirements or None if any of the requirements is unknown
+    """
+    merged = set()
+
+    for requirement in requirements:
+        if requirement is None:
+            return None
+        merged.update(requirement)
+
+    return merged
@@ -2,7 +2,6 @@ from typing import List
 
 from abc import ABC, abstractmethod, abstractclassmethod
 from kogito.core.knowledge import KnowledgeGraph
-from kogito.evaluation.eval import topk_eval, METRIC_MAP
 
 
 class KnowledgeModel(ABC):
@@ -108,6 +107,9 @@ def evaluate(
     *args,
     **kwargs,
 ):
+    # Metric libraries are heavy, so they are loaded only when evaluating
+    from kogito.evaluation.eval import topk_eval, METRIC_MAP
+
     if not set(metrics).issubset(set(METRIC_MAP.keys())):
         raise ValueError(
             f"Invalid evaluation metrics found: {set(metrics) - set(METRIC_MAP.keys())}"
@@ -1,18 +1,138 @@
+import re
 import string
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from spacy.tokens import Doc
+from spacy.tokens import Doc, Span, Token
 from spacy.language import Language
+from spacy.matcher import DependencyMatcher
 from spacy.lang.en.stop_words import STOP_WORDS
 
-from kogito.core.head import KnowledgeHead, KnowledgeHeadType
+from kogito.core.head import HeadEntity, KnowledgeHead, KnowledgeHeadType, doc_id
+from kogito.core.language import profile_disable
 from kogito.core.utils import IGNORE_WORDS
 
+#: Words that are never part of a head
+HEAD_STOP_WORDS = frozenset(STOP_WORDS.union(IGNORE_WORDS))
+
+#: Negation words that are kept in canonical head keys, so that negated heads are never merged with positive ones
+NEGATION_WORDS = frozenset(
+    [
+        "not",
+        "no",
+        "never",
+        "nor",
+        "neither",
+        "none",
+        "nobody",
+        "nothing",
+        "nowhere",
+        "cannot",
+    ]
+)
+
+#: Default maximum number of characters in a window of windowed head extraction
+DEFAULT_WINDOW_SIZE = 10000
+#: Default number of windows parsed at once, which bounds the memory used by windowed head extraction
+DEFAULT_WINDOW_BATCH_SIZE = 4
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+if not Doc.has_extension("kogito_heads"):
+    Doc.set_extension("kogito_heads", default=None)
+
+#: Head types that are matched with the same relations and can be merged with each other
+HEAD_TYPE_GROUPS = {
+    KnowledgeHeadType.TEXT: KnowledgeHeadType.SENTENCE,
+    KnowledgeHeadType.SENTENCE: KnowledgeHeadType.SENTENCE,
+    KnowledgeHeadType.NOUN_PHRASE: KnowledgeHeadType.NOUN_PHRASE,
+    KnowledgeHeadType.VERB_PHRASE: KnowledgeHeadType.VERB_PHRASE,
+}
+
+_VERB = {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"POS": "VERB"}}
+
+#: Default dependency patterns of :class:`DependencyVerbPhraseHeadExtractor`.
+#: First node of each pattern is the verb, e.g. "to give", "give up", "look at picture", "not go", "can swim".
+VERB_PHRASE_PATTERNS = {
+    "verb": [_VERB],
+    "object": [
+        _VERB,
+        {
+            "LEFT_ID": "verb",
+            "REL_OP": ">",
+            "RIGHT_ID": "object",
+            "RIGHT_ATTRS": {"DEP": {"IN": ["dobj", "attr"]}},
+        },
+    ],
+    "particle": [
+        _VERB,
+        {
+            "LEFT_ID": "verb",
+            "REL_OP": ">",
+            "RIGHT_ID": "particle",
+            "RIGHT_ATTRS": {"DEP": "prt"},
+        },
+    ],
+    "particle_object": [
+        _VERB,
+        {
+            "LEFT_ID": "verb",
+            "REL_OP": ">",
+            "RIGHT_ID": "particle",
+            "RIGHT_ATTRS": {"DEP": "prt"},
+        },
+        {
+            "LEFT_ID": "verb",
+            "REL_OP": ">",
+            "RIGHT_ID": "object",
+            "RIGHT_ATTRS": {"DEP": "dobj"},
+        },
+    ],
+    "prepositional_object": [
+        _VERB,
+        {
+            "LEFT_ID": "verb",
+            "REL_OP": ">",
+            "RIGHT_ID": "preposition",
+            "RIGHT_ATTRS": {"DEP": "prep"},
+        },
+        {
+            "LEFT_ID": "preposition",
+            "REL_OP": ">",
+            "RIGHT_ID": "object",
+            "RIGHT_ATTRS": {"DEP": "pobj"},
+        },
+    ],
+    "negation": [
+        _VERB,
+        {
+            "LEFT_ID": "verb",
+            "REL_OP": ">",
+            "RIGHT_ID": "negation",
+            "RIGHT_ATTRS": {"DEP": "neg"},
+        },
+    ],
+    "auxiliary": [
+        _VERB,
+        {
+            "LEFT_ID": "verb",
+            "REL_OP": ">",
+            "RIGHT_ID": "auxiliary",
+            # Only modals, other auxiliaries (e.g. "are eat", "did eat") do not read as heads with a lemmatized verb
+            "RIGHT_ATTRS": {"DEP": "aux", "TAG": "MD"},
+        },
+    ],
+}
+
 
 class KnowledgeHeadExtractor(ABC):
     """Base class for head extraction"""
 
+    #: Spacy capabilities needed by the extractor (see :mod:`kogito.core.language`),
+    #: None if the full pipeline is needed
+    language_requirements: Optional[Set[str]] = None
+
     def __init__(self, name: str, lang: Optional[Language] = None) -> None:
         """Initialize a head extractor
 
@@ -23,6 +143,14 @@ class KnowledgeHeadExtractor(ABC):
         self.name = name
         self.lang = lang
 
+    def _get_doc(self, text: str, doc: Optional[Doc] = None) -> Doc:
+        if doc is None:
+            # Pipeline may be the shared full profile, only the components the extractor needs are run
+            doc = self.lang(
+                text, disable=profile_disable(self.lang, self.language_requirements)
+            )
+        return doc
+
     @abstractmethod
     def extract(self, text: str, doc: Optional[Doc] = None) -> List[KnowledgeHead]:
         """Extract heads from text
@@ -40,113 +168,571 @@ class KnowledgeHeadExtractor(ABC):
         """
         raise NotImplementedError
 
+    def extract_batch(
+        self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1
+    ) -> Iterator[List[KnowledgeHead]]:
+        """Extract heads from many texts.
+        Texts are streamed through ``Language.pipe``, so that spacy can parse them in batches
+        and optionally, in multiple processes.
 
-class SentenceHeadExtractor(KnowledgeHeadExtractor):
-    """Extracts sentences as heads from text"""
+        Args:
+            texts (Iterable[str]): Texts to extract from.
+            batch_size (int, optional): Number of texts to parse at once. Defaults to 64.
+            n_process (int, optional): Number of processes to parse texts in. Defaults to 1.
 
-    def extract(self, text: str, doc: Optional[Doc] = None) -> List[KnowledgeHead]:
-        if not doc:
-            doc = self.lang(text)
+        Yields:
+            List[KnowledgeHead]: List of extracted knowledge heads for each text in the input order.
+        """
+        for doc in self._pipe(texts, batch_size=batch_size, n_process=n_process):
+            yield self.extract(doc.text, doc)
+
+    def extract_windows(
+        self,
+        text: str,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        max_heads: Optional[int] = None,
+        batch_size: int = DEFAULT_WINDOW_BATCH_SIZE,
+    ) -> List[KnowledgeHead]:
+        """Extract heads from a long text (e.g. a book or a transcript) window by window.
+        Text is split into windows on paragraph and sentence boundaries (see :func:`split_windows`),
+        which are parsed in a stream, so that only a batch of windows is kept in memory at once.
+        Heads are deduplicated across windows and do not keep the parsed windows alive.
 
-        heads = []
+        Args:
+            text (str): Text to extract from.
+            window_size (int, optional): Maximum number of characters in a window. Defaults to 10000.
+            max_heads (Optional[int], optional): Maximum number of heads to extract. If given, parsing stops
+                                                 once the limit is reached. Defaults to None.
+            batch_size (int, optional): Number of windows to parse at once. Defaults to 4.
 
-        for sentence in doc.sents:
-            if sentence.text.strip():
-                heads.append(
-                    KnowledgeHead(
-                        text=sentence.text,
-                        type=KnowledgeHeadType.SENTENCE,
-                        entity=sentence,
-                    )
-                )
+        Returns:
+            List[KnowledgeHead]: List of extracted knowledge heads.
+        """
+        docs = self._pipe(split_windows(text, window_size), batch_size=batch_size)
+        return merge_window_heads(
+            (self.extract(doc.text, doc) for doc in docs), max_heads=max_heads
+        )
+
+    def _pipe(
+        self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1
+    ) -> Iterator[Doc]:
+        return self.lang.pipe(
+            texts,
+            batch_size=batch_size,
+            n_process=n_process,
+            disable=profile_disable(self.lang, self.language_requirements),
+        )
+
+
+class DocHeadExtractor(KnowledgeHeadExtractor):
+    """Base class for extractors of heads found by the ``kogito_heads`` spacy component"""
+
+    #: Kind of heads in ``Doc._.kogito_heads``
+    head_kind: str = None
+    #: Type of extracted heads
+    head_type: KnowledgeHeadType = None
 
-        return heads
+    def extract(self, text: str, doc: Optional[Doc] = None) -> List[KnowledgeHead]:
+        return _materialize_heads(
+            self._get_doc(text, doc), self.head_kind, self.head_type
+        )
+
+    def _pipe(
+        self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1
+    ) -> Iterator[Doc]:
+        docs = self.lang.pipe(
+            texts,
+            batch_size=batch_size,
+            n_process=n_process,
+            disable=profile_disable(self.lang, self.language_requirements),
+        )
+
+        if "kogito_heads" in self.lang.pipe_names:
+            # Heads were extracted in the parsing processes and sent back with the docs
+            return docs
+
+        # Pipeline may be shared (see kogito.core.language), so heads are extracted
+        # in a separate step instead of adding the component to it
+        return (kogito_heads_component(doc) for doc in docs)
+
+
+class SentenceHeadExtractor(DocHeadExtractor):
+    """Extracts sentences as heads from text"""
 
+    head_kind = "sentence"
+    language_requirements = {"sentences"}
+    head_type = KnowledgeHeadType.SENTENCE
 
-class NounPhraseHeadExtractor(KnowledgeHeadExtractor):
+
+class NounPhraseHeadExtractor(DocHeadExtractor):
     """Extracts noun phrases as heads from text"""
 
-    def extract(self, text: str, doc: Optional[Doc] = None) -> List[KnowledgeHead]:
-        if not doc:
-            doc = self.lang(text)
+    head_kind = "noun_phrase"
+    language_requirements = {"pos", "parse"}
+    head_type = KnowledgeHeadType.NOUN_PHRASE
 
-        heads = []
-        head_texts = set()
 
-        for token in doc:
-            if (
-                token.text.strip().lower() not in STOP_WORDS.union(IGNORE_WORDS)
-                and token.pos_ == "NOUN"
-            ):
-                token_text = token.text.strip(string.punctuation + " ")
-                if token_text not in head_texts and len(token_text) > 1:
-                    head_texts.add(token_text)
-                    heads.append(
-                        KnowledgeHead(
-                            text=token.text.strip(),
-                            type=KnowledgeHeadType.NOUN_PHRASE,
-                            entity=token,
-                        )
-                    )
+class VerbPhraseHeadExtractor(DocHeadExtractor):
+    """Extracts verb phrases as heads from text"""
 
-        for phrase in doc.noun_chunks:
-            clean_phrase = []
-            phrase_doc = self.lang(phrase.text)
+    head_kind = "verb_phrase"
+    language_requirements = {"lemma", "parse"}
+    head_type = KnowledgeHeadType.VERB_PHRASE
+
+
+class DependencyVerbPhraseHeadExtractor(KnowledgeHeadExtractor):
+    """Extracts verb phrases as heads from text by matching dependency patterns with spacy's ``DependencyMatcher``.
+    Besides verbs and their objects, default patterns also cover particles, prepositional objects,
+    negation and modal auxiliaries. Verbs are lemmatized and negations are normalized to "not".
+    """
 
-            for token in phrase_doc:
-                if token.text.strip().lower() not in STOP_WORDS.union(IGNORE_WORDS):
-                    clean_phrase.append(token.text)
+    language_requirements = {"lemma", "parse"}
 
-            clean_text = " ".join(clean_phrase).strip(string.punctuation + " ")
+    def __init__(
+        self,
+        name: str,
+        lang: Optional[Language] = None,
+        patterns: Optional[Dict[str, List[dict]]] = None,
+    ) -> None:
+        """Initialize a dependency verb phrase extractor
 
-            if clean_text and clean_text not in head_texts and len(clean_text) > 1:
-                head_texts.add(clean_text)
+        Args:
+            name (str): Unique head extractor name
+            lang (Optional[Language], optional): Spacy language pipeline to use. Defaults to None.
+            patterns (Optional[Dict[str, List[dict]]], optional): ``DependencyMatcher`` patterns by their label.
+                First node of each pattern should be the verb. A pattern with only the verb node produces
+                heads of the form "to <verb>". Defaults to :data:`VERB_PHRASE_PATTERNS`.
+        """
+        super().__init__(name, lang)
+        self.patterns = patterns if patterns is not None else VERB_PHRASE_PATTERNS
+        self._matcher = None
+        self._pattern_order = {}
+
+    def _get_matcher(self, doc: Doc) -> DependencyMatcher:
+        # Patterns are compiled once per vocabulary, i.e. language pipeline
+        if self._matcher is None or self._matcher.vocab is not doc.vocab:
+            self._matcher = DependencyMatcher(doc.vocab)
+
+            for label, pattern in self.patterns.items():
+                self._matcher.add(label, [pattern])
+
+            self._pattern_order = {
+                doc.vocab.strings[label]: order
+                for order, label in enumerate(self.patterns)
+            }
+
+        return self._matcher
+
+    def extract(self, text: str, doc: Optional[Doc] = None) -> List[KnowledgeHead]:
+        doc = self._get_doc(text, doc)
+
+        if not doc.has_annotation("DEP"):
+            return []
+
+        matches = sorted(
+            self._get_matcher(doc)(doc),
+            key=lambda match: (match[1][0], self._pattern_order[match[0]], match[1]),
+        )
+        heads = []
+        head_texts = set()
+        key = doc_id(doc)
+
+        for _, token_ids in matches:
+            verb = doc[token_ids[0]]
+
+            if len(token_ids) == 1:
+                head_text = f"to {verb.lemma_}"
+                token_offsets = None
+            else:
+                token_offsets = tuple(sorted(set(token_ids)))
+                head_text = " ".join(
+                    _verb_phrase_word(doc[idx], verb) for idx in token_offsets
+                )
+
+            if head_text not in head_texts:
+                head_texts.add(head_text)
                 heads.append(
                     KnowledgeHead(
-                        text=clean_text,
-                        type=KnowledgeHeadType.NOUN_PHRASE,
-                        entity=phrase,
+                        text=head_text,
+                        type=KnowledgeHeadType.VERB_PHRASE,
+                        entity=_head_entity(
+                            doc,
+                            key,
+                            "verb_phrase",
+                            verb.i,
+                            verb.i + 1,
+                            token_offsets,
+                        ),
                     )
                 )
 
         return heads
 
 
-class VerbPhraseHeadExtractor(KnowledgeHeadExtractor):
-    """Extracts verb phrases as heads from text"""
+@Language.component("kogito_heads")
+def kogito_heads_component(doc: Doc) -> Doc:
+    """Spacy pipeline component that extracts sentence, noun phrase and verb phrase heads
+    and stores them on the ``Doc._.kogito_heads`` extension.
+
+    Args:
+        doc (Doc): Parsed doc.
+
+    Returns:
+        Doc: The same doc with extracted heads.
+    """
+    doc._.kogito_heads = extract_doc_heads(doc)
+    return doc
+
+
+def extract_doc_heads(doc: Doc) -> Dict[str, List[Tuple[str, int, int, Optional[int]]]]:
+    """Extract sentence, noun phrase and verb phrase heads from a parsed doc in a single pass over its tokens.
+    Heads are returned as serializable ``(text, start, end, child)`` tuples, where ``start`` and ``end``
+    are token offsets of the head span in the doc and ``child`` is the token offset of the object
+    of a verb phrase head, if any.
+
+    Args:
+        doc (Doc): Parsed doc.
+
+    Returns:
+        Dict[str, List[Tuple[str, int, int, Optional[int]]]]: Heads by their kind (sentence, noun_phrase, verb_phrase)
+    """
+    sentence_heads = []
+    noun_phrase_heads = []
+    verb_phrase_heads = []
+    noun_phrase_texts = set()
+    verb_phrase_texts = set()
+    sentence_start = 0
+
+    for token in doc:
+        if token.i > 0 and token.is_sent_start:
+            _add_sentence_head(sentence_heads, doc, sentence_start, token.i)
+            sentence_start = token.i
+
+        if token.pos_ == "NOUN" and token.text.strip().lower() not in HEAD_STOP_WORDS:
+            token_text = token.text.strip(string.punctuation + " ")
+            if token_text not in noun_phrase_texts and len(token_text) > 1:
+                noun_phrase_texts.add(token_text)
+                noun_phrase_heads.append(
+                    (token.text.strip(), token.i, token.i + 1, None)
+                )
+        elif token.pos_ == "VERB":
+            _add_verb_phrase_heads(verb_phrase_heads, verb_phrase_texts, token)
 
-    def extract(self, text: str, doc: Optional[Doc] = None) -> List[KnowledgeHead]:
-        if not doc:
-            doc = self.lang(text)
+    if len(doc) > 0:
+        _add_sentence_head(sentence_heads, doc, sentence_start, len(doc))
 
-        heads = []
-        head_texts = set()
+    if doc.has_annotation("DEP"):
+        # Noun chunks are cleaned using their own tokens, so there is no need to parse them again
+        for phrase in doc.noun_chunks:
+            clean_text = " ".join(
+                token.text
+                for token in phrase
+                if token.text.strip().lower() not in HEAD_STOP_WORDS
+            ).strip(string.punctuation + " ")
 
-        for token in doc:
-            if token.pos_ == "VERB":
-                verb_text = f"to {token.lemma_}"
-
-                if verb_text not in head_texts:
-                    head_texts.add(verb_text)
-                    heads.append(
-                        KnowledgeHead(
-                            text=verb_text,
-                            type=KnowledgeHeadType.VERB_PHRASE,
-                            entity=token,
-                        )
+            if (
+                clean_text
+                and clean_text not in noun_phrase_texts
+                and len(clean_text) > 1
+            ):
+                noun_phrase_texts.add(clean_text)
+                noun_phrase_heads.append((clean_text, phrase.start, phrase.end, None))
+
+    return {
+        "sentence": sentence_heads,
+        "noun_phrase": noun_phrase_heads,
+        "verb_phrase": verb_phrase_heads,
+    }
+
+
+def _add_verb_phrase_heads(
+    heads: List[Tuple[str, int, int, Optional[int]]],
+    head_texts: Set[str],
+    verb: Token,
+) -> None:
+    verb_text = f"to {verb.lemma_}"
+
+    if verb_text not in head_texts:
+        head_texts.add(verb_text)
+        heads.append((verb_text, verb.i, verb.i + 1, None))
+
+    for child in verb.children:
+        if child.dep_ in ("attr", "dobj"):
+            child_text = f"{verb.lemma_} {child.text}"
+            if child_text not in head_texts:
+                head_texts.add(child_text)
+                heads.append((child_text, verb.i, verb.i + 1, child.i))
+
+
+def split_windows(text: str, window_size: int = DEFAULT_WINDOW_SIZE) -> Iterator[str]:
+    """Split a long text into windows for parsing.
+    Whole paragraphs are packed into windows of at most ``window_size`` characters.
+    Longer paragraphs are split on sentence boundaries and sentences longer than a window
+    are split on whitespace.
+
+    Args:
+        text (str): Text to split.
+        window_size (int, optional): Maximum number of characters in a window. Defaults to 10000.
+
+    Raises:
+        ValueError: if window size is not positive
+
+    Yields:
+        str: Text windows in order
+    """
+    if window_size < 1:
+        raise ValueError("Window size should be positive")
+
+    window = []
+    window_length = 0
+
+    for separator, segment in _text_segments(text, window_size):
+        if window and window_length + len(separator) + len(segment) > window_size:
+            yield "".join(window)
+            window = []
+            window_length = 0
+
+        if window:
+            window.append(separator)
+            window_length += len(separator)
+
+        window.append(segment)
+        window_length += len(segment)
+
+    if window:
+        yield "".join(window)
+
+
+def merge_window_heads(
+    window_heads: Iterable[List[KnowledgeHead]], max_heads: Optional[int] = None
+) -> List[KnowledgeHead]:
+    """Merge heads extracted from the windows of a text.
+    Heads are deduplicated by their lowercased text and spacy spans or tokens of custom extractors are dropped,
+    so that parsed windows can be freed as soon as their heads are extracted. :class:`HeadEntity` references
+    are kept and refer to the windows by their ids.
+
+    Args:
+        window_heads (Iterable[List[KnowledgeHead]]): Heads of each window. Windows are consumed lazily.
+        max_heads (Optional[int], optional): Maximum number of heads to keep. If given, remaining windows
+                                             are not consumed once the limit is reached. Defaults to None.
+
+    Returns:
+        List[KnowledgeHead]: Merged heads in order of appearance
+    """
+    heads = []
+    head_texts = set()
+
+    for extracted_heads in window_heads:
+        for head in extracted_heads:
+            if max_heads is not None and len(heads) >= max_heads:
+                return heads
+
+            head_text = head.text.strip().lower()
+
+            if head_text not in head_texts:
+                head_texts.add(head_text)
+                entity = head.entity if isinstance(head.entity, HeadEntity) else None
+                heads.append(
+                    KnowledgeHead(
+                        text=head.text,
+                        type=head.type,
+                        entity=entity,
+                        verbalizer=head.verbalizer,
                     )
+                )
 
-                for child in token.children:
-                    if child.dep_ in ("attr", "dobj"):
-                        child_text = f"{token.lemma_} {child.text}"
-                        if child_text not in head_texts:
-                            head_texts.add(child_text)
-                            heads.append(
-                                KnowledgeHead(
-                                    text=child_text,
-                                    type=KnowledgeHeadType.VERB_PHRASE,
-                                    entity=[token, child],
-                                )
-                            )
+    return heads
 
-        return heads
+
+def _text_segments(text: str, window_size: int) -> Iterator[Tuple[str, str]]:
+    # Segments are yielded with the separator to put before them in a window
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+
+        if not paragraph:
+            continue
+
+        if len(paragraph) <= window_size:
+            yield "\n\n", paragraph
+            continue
+
+        separator = "\n\n"
+
+        for sentence in _SENTENCE_RE.split(paragraph):
+            if len(sentence) <= window_size:
+                yield separator, sentence
+            else:
+                for chunk in _split_words(sentence, window_size):
+                    yield separator, chunk
+                    separator = " "
+
+            separator = " "
+
+
+def _split_words(text: str, window_size: int) -> Iterator[str]:
+    chunk = ""
+
+    for word in text.split():
+        # Words longer than a window are cut
+        while len(word) > window_size:
+            if chunk:
+                yield chunk
+                chunk = ""
+            yield word[:window_size]
+            word = word[window_size:]
+
+        if chunk and len(chunk) + 1 + len(word) > window_size:
+            yield chunk
+            chunk = ""
+
+        chunk = f"{chunk} {word}" if chunk else word
+
+    if chunk:
+        yield chunk
+
+
+def _add_sentence_head(
+    sentence_heads: List[Tuple[str, int, int, Optional[int]]],
+    doc: Doc,
+    start: int,
+    end: int,
+) -> None:
+    sentence = doc[start:end]
+    if sentence.text.strip():
+        sentence_heads.append((sentence.text, start, end, None))
+
+
+def _verb_phrase_word(token: Token, verb: Token) -> str:
+    if token == verb:
+        return token.lemma_
+    if token.dep_ == "neg":
+        return "not"
+    return token.text
+
+
+def _materialize_heads(
+    doc: Doc, kind: str, head_type: KnowledgeHeadType
+) -> List[KnowledgeHead]:
+    if doc._.kogito_heads is None:
+        # Doc was parsed without the kogito_heads component
+        doc._.kogito_heads = extract_doc_heads(doc)
+
+    heads = []
+    key = doc_id(doc)
+
+    for text, start, end, child in doc._.kogito_heads[kind]:
+        tokens = (start, child) if child is not None else None
+        entity = _head_entity(doc, key, kind, start, end, tokens)
+        heads.append(KnowledgeHead(text=text, type=head_type, entity=entity))
+
+    return heads
+
+
+def _head_entity(
+    doc: Doc,
+    key: str,
+    kind: str,
+    start: int,
+    end: int,
+    tokens: Optional[Tuple[int, ...]] = None,
+) -> HeadEntity:
+    # Heads refer to the doc by offsets, so that they do not keep it alive
+    if tokens is not None:
+        start, end = min(tokens), max(tokens) + 1
+        head_tokens = [doc[idx] for idx in tokens]
+    else:
+        head_tokens = doc[start:end]
+
+    lemmas = tuple(
+        (token.lemma_ or token.text).lower()
+        for token in head_tokens
+        if not (token.is_punct or token.is_space)
+    )
+    span = doc[start:end]
+    return HeadEntity(
+        key, kind, start, end, span.start_char, span.end_char, tokens, lemmas
+    )
+
+
+def canonical_head_key(head: KnowledgeHead) -> Optional[Tuple]:
+    """Compute the canonical key of a head.
+    Key consists of the head type group and the lowercased lemmas of the head tokens without stop words
+    and punctuation. Negation words (see :data:`NEGATION_WORDS`) are kept even though they are stop words.
+    Lemmas are taken from the head entity, i.e. the already parsed doc.
+    Heads without an entity (e.g. custom heads) are keyed by their lowercased words instead.
+
+    Args:
+        head (KnowledgeHead): Knowledge head.
+
+    Returns:
+        Optional[Tuple]: Canonical key or None if nothing is left after normalization
+    """
+    entity = head.entity
+
+    if isinstance(entity, (Span, Token, Doc)):
+        entity = [entity]
+
+    if isinstance(entity, HeadEntity) and entity.lemmas is not None:
+        words = list(entity.lemmas)
+    elif isinstance(entity, list) and all(
+        isinstance(e, (Span, Token, Doc)) for e in entity
+    ):
+        words = []
+        for span in entity:
+            tokens = [span] if isinstance(span, Token) else span
+            for token in tokens:
+                if not (token.is_punct or token.is_space):
+                    words.append((token.lemma_ or token.text).lower())
+    else:
+        words = [word.lower() for word in head.text.split()]
+
+    words = [_key_word(word) for word in words]
+    words = tuple(
+        word
+        for word in words
+        if word and (word in NEGATION_WORDS or word not in HEAD_STOP_WORDS)
+    )
+
+    if not words:
+        return None
+
+    return (HEAD_TYPE_GROUPS.get(head.type, head.type), words)
+
+
+def _key_word(word: str) -> str:
+    word = word.strip(string.punctuation).replace("’", "'")
+    # Contracted negations, e.g. "n't" or "doesn't" in heads without a parsed entity
+    if word.endswith("n't"):
+        return "not"
+    return word
+
+
+def canonicalize_heads(
+    heads: List[KnowledgeHead],
+) -> Tuple[List[KnowledgeHead], Dict[KnowledgeHead, List[KnowledgeHead]]]:
+    """Merge equivalent heads, e.g. "dogs", "the dog" and "dog".
+    Heads with the same canonical key are represented by the first of them.
+
+    Args:
+        heads (List[KnowledgeHead]): Knowledge heads.
+
+    Returns:
+        Tuple[List[KnowledgeHead], Dict[KnowledgeHead, List[KnowledgeHead]]]: Representative heads and
+        a mapping from representative heads to the merged heads with other surface forms.
+    """
+    representatives = {}
+    canonical_heads = []
+    aliases = {}
+
+    for head in heads:
+        key = canonical_head_key(head)
+
+        if key is None:
+            canonical_heads.append(head)
+        elif key not in representatives:
+            representatives[key] = head
+            canonical_heads.append(head)
+        elif head.text != representatives[key].text:
+            aliases.setdefault(representatives[key], []).append(head)
+
+    return canonical_heads, aliases
@@ -6,35 +6,41 @@ from torch.optim import Adam
 from torch import nn
 import pytorch_lightning as pl
 from transformers import (
-    DistilBertTokenizer,
+    DistilBertTokenizerFast,
     DistilBertModel,
     PretrainedConfig,
     PreTrainedModel,
 )
 
-from kogito.core.processors.models.utils import Evaluator
+from kogito.core.processors.models.utils import Evaluator, collate_head_batch
+
+
+def get_tokenizer(tokenizer_type="uncased"):
+    """Load the fast tokenizer of a head dataset, to be created once and shared by datasets
+
+    Args:
+        tokenizer_type (str, optional): Tokenizer type, cased or uncased. Defaults to "uncased".
+
+    Returns:
+        DistilBertTokenizerFast: Loaded tokenizer
+    """
+    return DistilBertTokenizerFast.from_pretrained(f"distilbert-base-{tokenizer_type}")
 
 
 class DistilBERTHeadDataset(Dataset):
-    def __init__(self, data, tokenizer_type="uncased"):
-        self.tokenizer = DistilBertTokenizer.from_pretrained(
-            f"distilbert-base-{tokenizer_type}"
-        )
+    def __init__(self, data, tokenizer_type="uncased", tokenizer=None):
+        self.tokenizer = tokenizer or get_tokenizer(tokenizer_type)
         self.labels = (
             np.asarray(data["label"].to_list())
             if isinstance(data, pd.DataFrame)
             else None
         )
         texts = data["text"] if isinstance(data, pd.DataFrame) else data
+        # Texts are tokenized at once and padded per batch in collate
+        encodings = self.tokenizer(list(texts), max_length=32, truncation=True)
         self.features = [
-            self.tokenizer(
-                text,
-                padding="max_length",
-                max_length=32,
-                truncation=True,
-                return_tensors="pt",
-            )
-            for text in texts
+            {key: encodings[key][idx] for key in encodings.keys()}
+            for idx in range(len(encodings["input_ids"]))
         ]
 
     def __len__(self):
@@ -45,6 +51,9 @@ class DistilBERTHeadDataset(Dataset):
             return self.features[idx], self.labels[idx]
         return self.features[idx]
 
+    def collate(self, batch):
+        return collate_head_batch(self.tokenizer, batch)
+
 
 class DistilBERTConfig(PretrainedConfig):
     def __init__(
@@ -5,11 +5,11 @@ from torch.optim import Adam
 from torch import nn
 import pytorch_lightning as pl
 import torch.nn.functional as F
-import spacy
 from torch.utils.data import Dataset
 from torch.nn.utils.rnn import pad_sequence
 from transformers import PretrainedConfig, PreTrainedModel
 
+from kogito.core.language import get_language
 from kogito.core.processors.models.utils import Evaluator, text_to_embedding
 
 
@@ -27,7 +27,8 @@ class SWEMHeadDataset(Dataset):
         labels = data["label"] if isinstance(data, pd.DataFrame) else None
 
         if not lang:
-            lang = spacy.load("en_core_web_sm")
+            # Only tokens are needed
+            lang = get_language("en_core_web_sm", set())
         self.texts = []
 
         if apply_pooling:
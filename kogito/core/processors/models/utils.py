@@ -1,11 +1,14 @@
+import torch
 import torchmetrics
 import numpy as np
-import spacy
+
+from kogito.core.language import get_language
 
 
 def text_to_embedding(text, vocab, embedding_matrix, pooling="max", lang=None):
     if not lang:
-        lang = spacy.load("en_core_web_sm")
+        # Only tokens are needed
+        lang = get_language("en_core_web_sm", set())
 
     doc = lang(text)
     vectors = []
@@ -19,6 +22,25 @@ def text_to_embedding(text, vocab, embedding_matrix, pooling="max", lang=None):
         return np.mean(vectors, axis=0, dtype=np.float32)
 
 
+def collate_head_batch(tokenizer, batch):
+    """Collate tokenized heads (and optionally, their labels) into a batch padded to its longest head
+
+    Args:
+        tokenizer: Tokenizer that produced the features.
+        batch: List of features or (features, label) pairs.
+
+    Returns:
+        Padded features and optionally, the tensor of labels
+    """
+    if isinstance(batch[0], tuple):
+        features, labels = zip(*batch)
+        return (
+            tokenizer.pad(list(features), return_tensors="pt"),
+            torch.as_tensor(np.stack(labels)),
+        )
+    return tokenizer.pad(list(batch), return_tensors="pt")
+
+
 class Evaluator:
     def __init__(self, *args, **kwargs) -> None:
         super().__init__()
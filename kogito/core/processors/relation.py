@@ -1,18 +1,16 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Optional, Type
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Tuple, Optional, Type
 from functools import partial
 import pkgutil
 from io import BytesIO
 
 import numpy as np
-import torch
-import pytorch_lightning as pl
 from spacy.language import Language
-from torch.utils.data import DataLoader, Dataset
 
-from kogito.core.head import KnowledgeHead
+from kogito.core.head import KnowledgeHead, KnowledgeHeadType
 from kogito.core.relation import (
     KnowledgeRelation,
+    RELATION_SIZE,
     HEAD_TO_RELATION_MAP,
     PHYSICAL_RELATIONS,
     EVENT_RELATIONS,
@@ -20,15 +18,21 @@ from kogito.core.relation import (
     CUSTOM_RELATIONS,
 )
 
-from kogito.core.processors.models.swem import SWEMHeadDataset, SWEMClassifier
-from kogito.core.processors.models.distilbert import (
-    DistilBERTHeadDataset,
-    DistilBERTClassifier,
-)
-from kogito.core.processors.models.bert import BERTHeadDataset, BERTClassifier
+if TYPE_CHECKING:
+    import torch
+    import pytorch_lightning as pl
+    from torch.utils.data import Dataset
 
 RELATION_CLASSES = [PHYSICAL_RELATIONS, EVENT_RELATIONS, SOCIAL_RELATIONS]
 
+#: Priority of head types used for ranking head-relation pairs (lower is better)
+HEAD_TYPE_PRIORITY = {
+    KnowledgeHeadType.TEXT: 0,
+    KnowledgeHeadType.SENTENCE: 1,
+    KnowledgeHeadType.VERB_PHRASE: 2,
+    KnowledgeHeadType.NOUN_PHRASE: 3,
+}
+
 
 class KnowledgeRelationMatcher(ABC):
     """Base class for relation matching"""
@@ -122,11 +126,13 @@ class ModelBasedRelationMatcher(KnowledgeRelationMatcher):
     def __init__(
         self,
         name: str,
-        dataset_class: Type[Dataset],
-        model_class: Type[pl.LightningModule],
+        dataset_class: Type["Dataset"],
+        model_class: Type["pl.LightningModule"],
         model_path: str,
         batch_size: int = 64,
         lang: Optional[Language] = None,
+        threshold: float = 0.5,
+        device: Optional[str] = None,
     ) -> None:
         """Initialize a model based relation matcher
 
@@ -137,13 +143,25 @@ class ModelBasedRelationMatcher(KnowledgeRelationMatcher):
             model_path (str): Model path to load model from
             batch_size (int, optional): Batch size for inference. Defaults to 64.
             lang (Optional[Language], optional): Spacy lang pipeline. Defaults to None.
+            threshold (float, optional): Probability above which a relation class is matched.
+                                         If no class passes, the most probable one is matched. Defaults to 0.5.
+            device (Optional[str], optional): Device to run the model on. Defaults to cuda if available, else cpu.
         """
+        import torch
+
         super().__init__(name, lang)
         self.dataset_class = dataset_class
         self.model_class = model_class
         self.model_path = model_path
         self.batch_size = batch_size
+        self.threshold = threshold
+        self.device = torch.device(
+            device or ("cuda" if torch.cuda.is_available() else "cpu")
+        )
+        # Model is moved to the device and put in eval mode once and reused across calls
         self.model = model_class.from_pretrained(model_path)
+        self.model.to(self.device)
+        self.model.eval()
 
     def match(
         self,
@@ -151,40 +169,70 @@ class ModelBasedRelationMatcher(KnowledgeRelationMatcher):
         relations: List[KnowledgeRelation] = None,
         **kwargs
     ) -> List[Tuple[KnowledgeHead, KnowledgeRelation]]:
-        data = [str(head) for head in heads]
-        dataset = self.dataset_class(data)
-        dataloader = DataLoader(dataset, batch_size=self.batch_size)
-        trainer = pl.Trainer()
-        predictions = torch.cat(
-            trainer.predict(self.model, dataloaders=dataloader)
-        ).numpy()
-        head_relations = []
-
-        for head, prob in zip(heads, predictions):
-            prediction = np.where(prob >= 0.5, 1, 0).tolist()
-            pred_rel_classes = [
-                RELATION_CLASSES[idx]
-                for idx, pred in enumerate(prediction)
-                if pred == 1
+        if not heads:
+            return []
+
+        predictions = self.predict([str(head) for head in heads])
+        matched = predictions >= self.threshold
+        # Heads without any confident class fall back to their most probable class
+        unmatched = np.flatnonzero(~matched.any(axis=1))
+        matched[unmatched, predictions[unmatched].argmax(axis=1)] = True
+        head_indices, class_indices = np.nonzero(matched)
+
+        class_relations = RELATION_CLASSES
+
+        if relations:
+            relation_set = set(relations)
+            class_relations = [
+                [relation for relation in rel_class if relation in relation_set]
+                for rel_class in RELATION_CLASSES
             ]
 
-            if not pred_rel_classes:
-                pred_rel_classes = [RELATION_CLASSES[np.argmax(prob)]]
+        return [
+            (heads[head_idx], relation)
+            for head_idx, class_idx in zip(
+                head_indices.tolist(), class_indices.tolist()
+            )
+            for relation in class_relations[class_idx]
+        ]
 
-            for rel_class in pred_rel_classes:
-                rels_to_match = rel_class
-                if relations:
-                    rels_to_match = set(rels_to_match).intersection(set(relations))
-                for relation in rels_to_match:
-                    head_relations.append((head, relation))
+    def predict(self, texts: List[str]) -> np.ndarray:
+        """Predict relation class probabilities of head texts.
+        Texts are run through the model in batches with a plain forward pass under ``torch.inference_mode``.
 
-        return head_relations
+        Args:
+            texts (List[str]): Head texts.
+
+        Returns:
+            np.ndarray: Probabilities of relation classes (physical, event, social) for each text
+        """
+        import torch
+        from torch.utils.data import DataLoader
+
+        dataset = self.dataset_class(texts)
+        # Datasets with a collate method pad each batch to its longest text
+        dataloader = DataLoader(
+            dataset,
+            batch_size=self.batch_size,
+            collate_fn=getattr(dataset, "collate", None),
+        )
+        predictions = []
+
+        with torch.inference_mode():
+            for batch_idx, batch in enumerate(dataloader):
+                predictions.append(
+                    self.model.predict_step(_to_device(batch, self.device), batch_idx)
+                )
+
+        return torch.cat(predictions).cpu().numpy()
 
 
 class SWEMRelationMatcher(ModelBasedRelationMatcher):
     """Relation matcher based on Simple Word Embeddings (GloVe)"""
 
     def __init__(self, name: str, lang: Optional[Language] = None) -> None:
+        from kogito.core.processors.models.swem import SWEMHeadDataset, SWEMClassifier
+
         vocab = np.load(
             BytesIO(pkgutil.get_data(__name__, "data/vocab_glove_100d.npy")),
             allow_pickle=True,
@@ -205,7 +253,14 @@ class DistilBERTRelationMatcher(ModelBasedRelationMatcher):
     """Relation matcher based on DistilBERT embeddings"""
 
     def __init__(self, name: str, lang: Optional[Language] = None) -> None:
-        dataset_class = DistilBERTHeadDataset
+        from kogito.core.processors.models.distilbert import (
+            DistilBERTHeadDataset,
+            DistilBERTClassifier,
+            get_tokenizer,
+        )
+
+        # Tokenizer is loaded once and shared by the datasets of all match calls
+        dataset_class = partial(DistilBERTHeadDataset, tokenizer=get_tokenizer())
         model_class = DistilBERTClassifier
         model_path = "mismayil/kogito-rc-distilbert"
         super().__init__(
@@ -221,7 +276,14 @@ class BERTRelationMatcher(ModelBasedRelationMatcher):
     """Relation matcher based on BERT embeddings"""
 
     def __init__(self, name: str, lang: Optional[Language] = None) -> None:
-        dataset_class = BERTHeadDataset
+        from kogito.core.processors.models.bert import (
+            BERTHeadDataset,
+            BERTClassifier,
+            get_tokenizer,
+        )
+
+        # Tokenizer is loaded once and shared by the datasets of all match calls
+        dataset_class = partial(BERTHeadDataset, tokenizer=get_tokenizer())
         model_class = BERTClassifier
         model_path = "mismayil/kogito-rc-bert"
         super().__init__(
@@ -259,3 +321,47 @@ class GraphBasedRelationMatcher(KnowledgeRelationMatcher):
                     head_relations.append((head, relation))
 
         return head_relations
+
+
+def _to_device(batch: Any, device: "torch.device") -> Any:
+    if isinstance(batch, dict):
+        return {key: _to_device(value, device) for key, value in batch.items()}
+
+    if isinstance(batch, (list, tuple)):
+        return type(batch)(_to_device(value, device) for value in batch)
+
+    if hasattr(batch, "to"):
+        return batch.to(device)
+
+    return batch
+
+
+def rank_head_relations(
+    head_relations: Iterable[Tuple[KnowledgeHead, KnowledgeRelation]],
+    head_type_priority: Optional[Dict[KnowledgeHeadType, int]] = None,
+) -> List[Tuple[KnowledgeHead, KnowledgeRelation]]:
+    """Rank head-relation pairs from the most to the least promising.
+    Pairs are ranked by head type first and then by the size of the relation in ATOMIC,
+    i.e. relations with more training data come first. Remaining ties are broken by head
+    and relation text, so that ranking is deterministic.
+
+    Args:
+        head_relations (Iterable[Tuple[KnowledgeHead, KnowledgeRelation]]): Head-relation pairs to rank.
+        head_type_priority (Optional[Dict[KnowledgeHeadType, int]], optional): Priority of head types,
+                                                                              lower is better.
+                                                                              Defaults to HEAD_TYPE_PRIORITY.
+
+    Returns:
+        List[Tuple[KnowledgeHead, KnowledgeRelation]]: Ranked head-relation pairs
+    """
+    head_type_priority = head_type_priority or HEAD_TYPE_PRIORITY
+
+    return sorted(
+        head_relations,
+        key=lambda head_relation: (
+            head_type_priority.get(head_relation[0].type, len(head_type_priority)),
+            -RELATION_SIZE.get(head_relation[1].text, 0),
+            head_relation[0].text,
+            head_relation[1].text,
+        ),
+    )
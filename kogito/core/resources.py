@@ -0,0 +1,158 @@
+from typing import Dict, Iterator, List, Optional
+from contextlib import contextmanager
+import os
+import sys
+import threading
+
+#: Components that can be given their own thread budget
+#: spacy is not listed, its CPU ops do not use torch threads and are only limited by the worker budget
+#: set with :meth:`ResourceConfig.apply`
+RESOURCE_COMPONENTS = ["relation_matcher", "model", "linker"]
+
+#: Environment variables limiting native thread pools of a worker process
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+]
+
+# torch threads are a process-wide setting shared by all configurations and concurrently running components
+_torch_threads_lock = threading.Lock()
+_active_budgets: List[int] = []
+_base_threads: Optional[int] = None
+
+
+class ResourceConfig:
+    """
+    CPU thread budgets of inference components.
+    Total number of threads is split evenly across worker processes and each torch-based component
+    (relation matcher, knowledge model and linker) can use the budget of its worker
+    or a custom number of threads. Budgets are applied with ``torch.set_num_threads`` while
+    the component is running. Since torch threads are a process-wide setting, components running
+    at the same time (e.g. stages of an :class:`kogito.pipeline.InferencePipeline`) share
+    the largest of their budgets.
+    """
+
+    def __init__(
+        self,
+        num_threads: Optional[int] = None,
+        num_workers: int = 1,
+        component_threads: Optional[Dict[str, int]] = None,
+        tokenizers_parallelism: bool = False,
+    ) -> None:
+        """Initialize a resource configuration
+
+        Args:
+            num_threads (Optional[int], optional): Total number of threads to use across all workers.
+                                                   Defaults to the number of CPUs.
+            num_workers (int, optional): Number of worker processes sharing the threads. Defaults to 1.
+            component_threads (Optional[Dict[str, int]], optional): Number of threads per component,
+                which take precedence over the worker budget. Available components:
+                relation_matcher, model, linker. Defaults to None.
+            tokenizers_parallelism (bool, optional): Whether to let HuggingFace tokenizers use their own
+                                                     thread pool. Defaults to False.
+
+        Raises:
+            ValueError: if numbers of threads or workers are not positive or an unknown component is given
+        """
+        component_threads = component_threads or {}
+
+        if num_workers < 1:
+            raise ValueError("Number of workers should be positive")
+
+        if num_threads is not None and num_threads < 1:
+            raise ValueError("Number of threads should be positive")
+
+        if not set(component_threads).issubset(RESOURCE_COMPONENTS):
+            raise ValueError(
+                f"Unknown components: {set(component_threads) - set(RESOURCE_COMPONENTS)}"
+            )
+
+        if any(threads < 1 for threads in component_threads.values()):
+            raise ValueError("Number of threads should be positive")
+
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.num_workers = num_workers
+        self.component_threads = component_threads
+        self.tokenizers_parallelism = tokenizers_parallelism
+
+    @property
+    def worker_threads(self) -> int:
+        """Number of threads available to a single worker process.
+
+        Returns:
+            int: Number of threads
+        """
+        return max(1, self.num_threads // self.num_workers)
+
+    def threads(self, component: str) -> int:
+        """Number of threads available to a component.
+
+        Args:
+            component (str): Component name.
+
+        Returns:
+            int: Number of threads
+        """
+        return self.component_threads.get(component, self.worker_threads)
+
+    def apply(self) -> None:
+        """Apply the worker budget to the current process.
+        Should be called at the start of a worker process, before any model is loaded,
+        so that native thread pools are created with the right size.
+        """
+        for name in THREAD_ENV_VARS:
+            os.environ[name] = str(self.worker_threads)
+
+        os.environ["TOKENIZERS_PARALLELISM"] = str(self.tokenizers_parallelism).lower()
+
+        try:
+            import torch
+        except ImportError:
+            return
+
+        torch.set_num_threads(self.worker_threads)
+
+        try:
+            # Components of a worker run one at a time, so one inter-op thread is enough
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Inter-op threads can only be set before any parallel work has started
+            pass
+
+    @contextmanager
+    def use(self, component: str) -> Iterator[int]:
+        """Limit torch intra-op threads to the budget of a component while it is running.
+        Overlapping uses are reference-counted: the process uses the largest budget of the running
+        components and the original number of threads is restored once the last one finishes.
+
+        Args:
+            component (str): Component name.
+
+        Yields:
+            int: Number of threads available to the component
+        """
+        global _base_threads
+
+        threads = self.threads(component)
+        # torch is only loaded by components that need it, in which case its threads are limited
+        torch = sys.modules.get("torch")
+
+        if torch is None:
+            yield threads
+            return
+
+        with _torch_threads_lock:
+            if not _active_budgets:
+                _base_threads = torch.get_num_threads()
+            _active_budgets.append(threads)
+            torch.set_num_threads(max(_active_budgets))
+
+        try:
+            yield threads
+        finally:
+            with _torch_threads_lock:
+                _active_budgets.remove(threads)
+                torch.set_num_threads(
+                    max(_active_budgets) if _active_budgets else _base_threads
+                )
@@ -0,0 +1,118 @@
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+import time
+
+#: Stages of the inference pipeline recorded by the trace
+TRACE_STAGES = [
+    "head_extraction",
+    "relation_matching",
+    "retrieval",
+    "generation",
+    "linking",
+    "postprocessing",
+]
+
+#: Counters recorded by the trace
+TRACE_COUNTERS = [
+    "heads",
+    "merged_heads",
+    "head_relations",
+    "skipped_pairs",
+    "retrieved_pairs",
+    "generated_tails",
+    "filtered_tails",
+]
+
+
+class InferenceTrace:
+    """
+    Records wall time and counters of inference stages.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty inference trace."""
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator["InferenceTrace"]:
+        """Measure wall time of a stage. Time of repeated stages is accumulated.
+
+        Args:
+            name (str): Stage name.
+
+        Yields:
+            InferenceTrace: The trace itself.
+        """
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - start
+            )
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increment a counter.
+
+        Args:
+            name (str): Counter name.
+            value (int, optional): Value to increment by. Defaults to 1.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_heads(
+        self, heads: List[Any], aliases: Optional[Dict[Any, List[Any]]] = None
+    ) -> None:
+        """Count extracted heads and the heads merged into them.
+
+        Args:
+            heads (List[Any]): Extracted heads.
+            aliases (Optional[Dict[Any, List[Any]]], optional): Merged heads by their representative.
+                                                                Defaults to None.
+        """
+        self.count("heads", len(heads))
+
+        if aliases:
+            self.count("merged_heads", sum(len(alias) for alias in aliases.values()))
+
+    @property
+    def total_time(self) -> float:
+        """Total wall time of all recorded stages in seconds.
+
+        Returns:
+            float: Total time in seconds
+        """
+        return sum(self.timings.values())
+
+    def to_json(self) -> dict:
+        """Convert trace to dictionary
+
+        Returns:
+            dict: Jsonified trace with timings in milliseconds
+        """
+        return {
+            "timings": {
+                name: round(1000 * elapsed, 3) for name, elapsed in self.timings.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def __repr__(self) -> str:
+        return f"InferenceTrace({self.to_json()})"
+
+
+def with_trace(result: Any, trace: InferenceTrace, return_trace: bool) -> Any:
+    """Return an inference result together with its trace if requested.
+
+    Args:
+        result (Any): Inference result.
+        trace (InferenceTrace): Inference trace.
+        return_trace (bool): Whether to return the trace as well.
+
+    Returns:
+        Any: Result or a ``(result, trace)`` tuple
+    """
+    if return_trace:
+        return result, trace
+    return result
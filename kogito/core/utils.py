@@ -1,26 +1,35 @@
-import spacy
-import inflect
 import itertools
 import json
 import pickle
-from typing import Callable, Dict, Iterable, List
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List
 import uuid
 import math
 
-import numpy as np
-from rouge_score import rouge_scorer, scoring
-from sacrebleu import corpus_bleu
-from torch import nn
-from torch.utils.data import Sampler
+if TYPE_CHECKING:
+    from torch import nn
 
-from transformers import BartTokenizer
+# Heavy dependencies (spacy, inflect, torch, transformers and metric libraries)
+# are imported on first use to keep importing core modules fast.
 
 IGNORE_WORDS = set(["personx", "persony", "personz", "_", "'", "-"])
 ROUGE_KEYS = ["rouge1", "rouge2", "rougeL"]
 
 
+def __getattr__(name):
+    # SortishSampler moved to kogito.core.dataset, it is still importable from here without loading torch eagerly
+    if name == "SortishSampler":
+        from kogito.core.dataset import SortishSampler
+
+        return SortishSampler
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def vp_present_participle(phrase):
-    nlp = spacy.load("en_core_web_sm")
+    import inflect
+    from kogito.core.language import get_language
+
+    nlp = get_language("en_core_web_sm", {"pos"})
     doc = nlp(phrase)
     inflection_engine = inflect.engine()
     return " ".join(
@@ -34,6 +43,8 @@ def vp_present_participle(phrase):
 
 
 def posessive(word):
+    import inflect
+
     inflection_engine = inflect.engine()
     if inflection_engine.singular_noun(word) is False:
         return "have"
@@ -56,6 +67,8 @@ def find_nth(haystack, needle, n):
 def encode_line(
     tokenizer, line, max_length, pad_to_max_length=True, return_tensors="pt"
 ):
+    from transformers import BartTokenizer
+
     extra_kw = (
         {"add_prefix_space": True} if isinstance(tokenizer, BartTokenizer) else {}
     )
@@ -76,6 +89,8 @@ def lmap(f: Callable, x: Iterable) -> List:
 
 def calculate_bleu_score(output_lns, refs_lns, **kwargs) -> dict:
     """Uses sacrebleu's corpus_bleu implementation."""
+    from sacrebleu import corpus_bleu
+
     return {"bleu": corpus_bleu(output_lns, [refs_lns], **kwargs).score}
 
 
@@ -92,44 +107,6 @@ def trim_batch(
         return (input_ids[:, keep_column_mask], attention_mask[:, keep_column_mask])
 
 
-class SortishSampler(Sampler):
-    "Go through the text data by order of src length with a bit of randomness. From fastai repo."
-
-    def __init__(self, data, batch_size):
-        self.data, self.bs = data, batch_size
-
-    def key(self, i):
-        return self.data[i]
-
-    def __len__(self) -> int:
-        return len(self.data)
-
-    def __iter__(self):
-        idxs = np.random.permutation(len(self.data))
-        sz = self.bs * 50
-        ck_idx = [idxs[i : i + sz] for i in range(0, len(idxs), sz)]
-        sort_idx = np.concatenate(
-            [sorted(s, key=self.key, reverse=True) for s in ck_idx]
-        )
-        sz = self.bs
-        ck_idx = [sort_idx[i : i + sz] for i in range(0, len(sort_idx), sz)]
-        max_ck = np.argmax(
-            [self.key(ck[0]) for ck in ck_idx]
-        )  # find the chunk with the largest key,
-        ck_idx[0], ck_idx[max_ck] = (
-            ck_idx[max_ck],
-            ck_idx[0],
-        )  # then make sure it goes first.
-        if len(ck_idx) < 3:
-            return iter(np.concatenate(ck_idx))
-
-        sort_idx = np.concatenate(
-            [np.concatenate(np.random.permutation(ck_idx[1:-1])), ck_idx[-1]]
-        )
-        sort_idx = np.concatenate((ck_idx[0], sort_idx))
-        return iter(sort_idx)
-
-
 def pickle_load(path):
     """pickle.load(path)"""
     with open(path, "rb") as f:
@@ -159,6 +136,8 @@ def load_json(path):
 def calculate_rouge(
     output_lns: List[str], reference_lns: List[str], use_stemmer=True
 ) -> Dict:
+    from rouge_score import rouge_scorer, scoring
+
     scorer = rouge_scorer.RougeScorer(ROUGE_KEYS, use_stemmer=use_stemmer)
     aggregator = scoring.BootstrapAggregator()
 
@@ -170,16 +149,16 @@ def calculate_rouge(
     return {k: v.mid.fmeasure for k, v in result.items()}
 
 
-def freeze_params(model: nn.Module):
+def freeze_params(model: "nn.Module"):
     for par in model.parameters():
         par.requires_grad = False
 
 
-def grad_status(model: nn.Module) -> Iterable:
+def grad_status(model: "nn.Module") -> Iterable:
     return (par.requires_grad for par in model.parameters())
 
 
-def any_requires_grad(model: nn.Module) -> bool:
+def any_requires_grad(model: "nn.Module") -> bool:
     return any(grad_status(model))
 
 
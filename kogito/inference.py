@@ -1,7 +1,25 @@
-from typing import Union, List, Optional
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    Union,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+import asyncio
+import sys
+import time
 import warnings
 
-import spacy
+from spacy.tokens import Doc
 
 from kogito.core.knowledge import Knowledge, KnowledgeGraph
 from kogito.core.head import KnowledgeHead
@@ -10,31 +28,62 @@ from kogito.core.processors.head import (
     SentenceHeadExtractor,
     NounPhraseHeadExtractor,
     VerbPhraseHeadExtractor,
+    canonicalize_heads as merge_heads,
+    merge_window_heads,
+    split_windows,
+    DEFAULT_WINDOW_BATCH_SIZE,
+)
+from kogito.core.relation import KnowledgeRelation, RELATION_SIZE
+from kogito.core.language import (
+    FULL_PROFILE,
+    get_language,
+    merge_requirements,
+    profile_disable,
 )
-from kogito.core.relation import KnowledgeRelation
+from kogito.core.utils import chunks
 from kogito.core.processors.relation import (
     GraphBasedRelationMatcher,
     KnowledgeRelationMatcher,
     SimpleRelationMatcher,
     BaseRelationMatcher,
+    rank_head_relations,
 )
 from kogito.core.model import KnowledgeModel
 from kogito.core.linker import KnowledgeLinker
-from kogito.models.gpt3.zeroshot import GPT3Zeroshot
-from kogito.linkers.deberta import DebertaLinker
+from kogito.core.trace import InferenceTrace, with_trace
+from kogito.core.cache import GenerationCache, LRUCache
+from kogito.core.index import KnowledgeIndex
+from kogito.core.resources import ResourceConfig
+
+INFERENCE_STAGES = ["extraction", "matching", "generation", "linking"]
 
 
 class CommonsenseInference:
     """Main interface for commonsense inference"""
 
-    def __init__(self, language: str = "en_core_web_sm") -> None:
+    def __init__(
+        self,
+        language: str = "en_core_web_sm",
+        resources: Optional[ResourceConfig] = None,
+        head_cache: Optional[LRUCache] = None,
+    ) -> None:
         """Initialize a commonsense inference module
 
         Args:
             language (str, optional): Spacy language pipeline to use. Defaults to "en_core_web_sm".
+            resources (Optional[ResourceConfig], optional): CPU thread budgets of the inference components.
+                                                            Defaults to None, i.e. library defaults.
+            head_cache (Optional[LRUCache], optional): Cache of extracted heads keyed by the spacy pipeline,
+                the exact input text and the active head extractor instances. Repeated texts are
+                then not parsed again. It is cleared whenever a head extractor is added or removed.
+                ``infer_batch`` parses its texts together and does not use the cache. Workers of an
+                :class:`InferenceProcessPool` keep their own copies. Defaults to None.
         """
         self.language = language
-        self.nlp = spacy.load(language, exclude=["ner"])
+        self.resources = resources
+        self.head_cache = head_cache
+        # Components are enabled per call by the profile of the active head extractors
+        self.nlp = get_language(language, FULL_PROFILE)
 
         self._head_processors = {
             "sentence_extractor": SentenceHeadExtractor("sentence_extractor", self.nlp),
@@ -53,6 +102,7 @@ class CommonsenseInference:
                 "graph_matcher", self.nlp
             ),
         }
+        self._update_language_profile()
 
     @property
     def processors(self) -> dict:
@@ -80,7 +130,16 @@ class CommonsenseInference:
         context: Optional[Union[List[str], str]] = None,
         linker: Optional[KnowledgeLinker] = None,
         threshold: float = 0.5,
-    ) -> KnowledgeGraph:
+        canonicalize_heads: bool = False,
+        cache: Optional[GenerationCache] = None,
+        return_trace: bool = False,
+        max_pairs: Optional[int] = None,
+        deadline_ms: Optional[float] = None,
+        batch_size: int = 64,
+        reference: Optional[Union[KnowledgeGraph, KnowledgeIndex]] = None,
+        window_size: Optional[int] = None,
+        max_heads: Optional[int] = None,
+    ) -> Union[KnowledgeGraph, Tuple[KnowledgeGraph, InferenceTrace]]:
         """Make commonsense inferences.
 
         Args:
@@ -112,18 +171,720 @@ class CommonsenseInference:
             threshold (float, optional): Relevance probability used for filtering. Defaults to 0.5.
             linker (Optional[KnowledgeLinker], optional): Knowledge linker model used for linking to given context.
                                                             Defaults to Deberta-based linker.
+            cache (Optional[GenerationCache], optional): Generation cache to use. If given, only the
+                                                        head-relation pairs missing from the cache are
+                                                        sent to the model. Defaults to None.
+            return_trace (bool, optional): Whether to return the inference trace with per-stage timings
+                                            and counters. Defaults to False.
+            canonicalize_heads (bool, optional): Whether to merge equivalent heads (e.g. "dogs", "the dog"
+                and "dog") based on their lemmas without stop words before relation matching.
+                Knowledge is generated only for the first of the merged heads and copied to the others.
+                Defaults to False.
+            max_pairs (Optional[int], optional): Maximum number of head-relation pairs to generate for.
+                If given, pairs are ranked by head type and relation size in ATOMIC
+                and only the top ``max_pairs`` pairs are used. Defaults to None.
+            deadline_ms (Optional[float], optional): Time budget of the inference call in milliseconds.
+                If given, ranked pairs are generated in chunks of ``batch_size`` until the next chunk
+                is not expected to finish before the deadline. Linking and postprocessing of
+                the generated knowledge run after the deadline check. Defaults to None.
+            batch_size (int, optional): Number of head-relation pairs to generate per chunk
+                                        when ``deadline_ms`` is given. Defaults to 64.
+            reference (Optional[Union[KnowledgeGraph, KnowledgeIndex]], optional): Reference knowledge graph
+                (e.g. ATOMIC 2020) or its index. Head-relation pairs covered by the reference are answered
+                from it and only the remaining pairs are sent to the cache and the model.
+                Indexing a large graph takes time, so it is better to pass a prebuilt
+                :class:`kogito.core.index.KnowledgeIndex` when calling ``infer`` many times. Defaults to None.
+            window_size (Optional[int], optional): If given, long text is split into windows of at most
+                ``window_size`` characters on paragraph and sentence boundaries, which are parsed in a stream
+                and their heads are merged. Use it for texts beyond spacy's ``max_length``, e.g. books
+                or long transcripts. Defaults to None, i.e. text is parsed at once.
+            max_heads (Optional[int], optional): Maximum number of heads to extract from text.
+                In windowed mode, parsing stops once the limit is reached. Defaults to None.
 
         Raises:
-            ValueError: if relations argument is not of type list
+            ValueError: if relations argument is not of type list or max_pairs is not positive
 
         Returns:
-            KnowledgeGraph: Inferred knowledge graph.
+            Union[KnowledgeGraph, Tuple[KnowledgeGraph, InferenceTrace]]: Inferred knowledge graph
+            and optionally, the inference trace. If pairs were dropped because of ``max_pairs`` or
+            ``deadline_ms``, graph is marked as ``truncated``.
         """
-        kg_heads = []
-        head_relations = set()
-        head_texts = set()
+        start = time.perf_counter()
+        model_args = model_args or {}
+        trace = InferenceTrace()
+        text = self._validate_input(text, heads, relations)
+
+        if max_pairs is not None and max_pairs < 1:
+            raise ValueError("Maximum number of pairs should be positive")
+
+        if not text and not heads:
+            warnings.warn("Skipping inference, no text or head provided")
+            return with_trace(None, trace, return_trace)
+
+        with trace.stage("head_extraction"):
+            kg_heads, aliases = self._collect_canonical_heads(
+                text,
+                heads,
+                extract_heads,
+                canonicalize_heads,
+                window_size=window_size,
+                max_heads=max_heads,
+            )
+
+        trace.count_heads(kg_heads, aliases)
+
+        if not kg_heads:
+            warnings.warn("Skipping inference, no heads found.")
+            return with_trace(None, trace, return_trace)
+
+        with trace.stage("relation_matching"):
+            head_relations = self._match_relations(
+                kg_heads, match_relations, relations, sample_graph
+            )
+
+        trace.count("head_relations", len(head_relations))
+        truncated = False
+
+        if max_pairs is not None or deadline_ms is not None:
+            head_relations = rank_head_relations(head_relations)
+
+            if max_pairs is not None and len(head_relations) > max_pairs:
+                trace.count("skipped_pairs", len(head_relations) - max_pairs)
+                head_relations = head_relations[:max_pairs]
+                truncated = True
+
+        if dry_run or not model:
+            input_graph = self._build_input_graph(
+                head_relations, sample_graph, model
+            ).expand_aliases(aliases)
+            input_graph.truncated = truncated
+            return with_trace(input_graph.sort(), trace, return_trace)
+
+        retrieved_kgs = []
+
+        if reference is not None:
+            with trace.stage("retrieval"):
+                retrieved_kgs, head_relations = self._retrieve(
+                    head_relations, reference
+                )
+
+            trace.count("retrieved_pairs", len(retrieved_kgs))
+
+        if not head_relations:
+            output_graph = KnowledgeGraph([])
+        elif deadline_ms is None:
+            input_graph = self._build_input_graph(head_relations, sample_graph, model)
+            output_graph = self._generate(model, input_graph, model_args, trace, cache)
+        else:
+            output_kgs = []
+            num_pairs = 0
+
+            for head_relation_chunk, chunk_graph in self._generate_chunks(
+                model,
+                head_relations,
+                sample_graph,
+                model_args,
+                trace,
+                cache,
+                batch_size,
+                deadline=start + deadline_ms / 1000,
+            ):
+                output_kgs.extend(chunk_graph)
+                num_pairs += len(head_relation_chunk)
+
+            if num_pairs < len(head_relations):
+                trace.count("skipped_pairs", len(head_relations) - num_pairs)
+                truncated = True
+
+            output_graph = KnowledgeGraph(output_kgs)
+
+        if retrieved_kgs:
+            output_graph = KnowledgeGraph(retrieved_kgs + list(output_graph))
+
+        output_graph = self._postprocess(
+            output_graph.expand_aliases(aliases), context, linker, threshold, trace
+        )
+        output_graph.truncated = truncated
+
+        return with_trace(output_graph, trace, return_trace)
+
+    def infer_batch(
+        self,
+        texts: List[str],
+        model: Optional[KnowledgeModel] = None,
+        heads: Optional[List[str]] = None,
+        model_args: Optional[dict] = None,
+        extract_heads: bool = True,
+        match_relations: bool = True,
+        relations: Optional[List[KnowledgeRelation]] = None,
+        dry_run: bool = False,
+        sample_graph: Optional[KnowledgeGraph] = None,
+        contexts: Optional[List[Optional[Union[List[str], str]]]] = None,
+        linker: Optional[KnowledgeLinker] = None,
+        threshold: float = 0.5,
+        canonicalize_heads: bool = False,
+        batch_size: int = 64,
+        cache: Optional[GenerationCache] = None,
+        return_trace: bool = False,
+    ) -> Union[
+        List[Optional[KnowledgeGraph]],
+        Tuple[List[Optional[KnowledgeGraph]], InferenceTrace],
+    ]:
+        """Make commonsense inferences for many texts at once.
+        Texts are parsed together with ``spacy``'s ``Language.pipe`` and head-relation pairs
+        of all texts are merged into a single input graph, so that the knowledge model is queried only once.
+        Generated knowledge is then split back per text. Each text is otherwise handled
+        exactly as in :meth:`CommonsenseInference.infer`, except that the head cache is not used.
+
+        Args:
+            texts (List[str]): Texts to extract commonsense inferences from.
+            model (Optional[KnowledgeModel], optional): Knowledge model to use for inference. Defaults to None.
+            heads (Optional[List[str]], optional): List of custom heads to use for inference of every text.
+                Defaults to None.
+            model_args (Optional[dict], optional): Custom arguments to pass to ``KnowledgeModel.generate()`` method.
+                Defaults to None.
+            extract_heads (bool, optional): Whether to extract heads from given texts. Defaults to True.
+            match_relations (bool, optional): Whether to do smart relation matching. Defaults to True.
+            relations (Optional[List[KnowledgeRelation]], optional): Subset of relations to use for direct matching.
+                Defaults to None.
+            dry_run (bool, optional): Whether to skip actual inference and return incomplete input graphs.
+                Defaults to False.
+            sample_graph (Optional[KnowledgeGraph], optional): A knowledge graph containing examples.
+                Defaults to None.
+            contexts (Optional[List[Optional[Union[List[str], str]]]], optional): Context for each text,
+                in the same order as ``texts``. Defaults to None.
+            linker (Optional[KnowledgeLinker], optional): Knowledge linker model used for linking to given contexts.
+                Defaults to Deberta-based linker.
+            threshold (float, optional): Relevance probability used for filtering. Defaults to 0.5.
+            batch_size (int, optional): Batch size for the ``spacy`` pipeline. Defaults to 64.
+            canonicalize_heads (bool, optional): Whether to merge equivalent heads of each text
+                                                 before relation matching. Defaults to False.
+            cache (Optional[GenerationCache], optional): Generation cache to use. Defaults to None.
+            return_trace (bool, optional): Whether to return the inference trace of the whole batch.
+                                            Defaults to False.
+
+        Raises:
+            ValueError: if texts or contexts are not lists
+
+        Returns:
+            Union[List[Optional[KnowledgeGraph]], Tuple[List[Optional[KnowledgeGraph]], InferenceTrace]]:
+            Inferred knowledge graph for each text or None if inference was skipped for that text
+            and optionally, the inference trace.
+        """
+        model_args = model_args or {}
+        trace = InferenceTrace()
+
+        if not isinstance(texts, list):
+            raise ValueError("Texts should be a list")
+
+        if contexts is not None:
+            if not isinstance(contexts, list) or len(contexts) != len(texts):
+                raise ValueError("Contexts should be a list of the same size as texts")
+
+        texts = [self._validate_input(text, heads, relations) for text in texts]
+        docs = [None] * len(texts)
+
+        if extract_heads:
+            parse_indices = [idx for idx, text in enumerate(texts) if text]
+            if parse_indices:
+                with trace.stage("head_extraction"):
+                    parsed_docs = self.nlp.pipe(
+                        [texts[idx] for idx in parse_indices],
+                        batch_size=batch_size,
+                        disable=self._disabled_components,
+                    )
+                    for idx, doc in zip(parse_indices, parsed_docs):
+                        docs[idx] = doc
+
+        text_head_relations = []
+        text_aliases = []
+
+        for text, doc in zip(texts, docs):
+            if not text and not heads:
+                warnings.warn("Skipping inference, no text or head provided")
+                text_head_relations.append(None)
+                text_aliases.append(None)
+                continue
+
+            with trace.stage("head_extraction"):
+                kg_heads, aliases = self._collect_canonical_heads(
+                    text, heads, extract_heads, canonicalize_heads, doc=doc
+                )
+
+            trace.count_heads(kg_heads, aliases)
+            text_aliases.append(aliases)
+
+            if not kg_heads:
+                warnings.warn("Skipping inference, no heads found.")
+                text_head_relations.append(None)
+                continue
+
+            with trace.stage("relation_matching"):
+                head_relations = self._match_relations(
+                    kg_heads, match_relations, relations, sample_graph
+                )
+
+            trace.count("head_relations", len(head_relations))
+            text_head_relations.append(head_relations)
+
+        if dry_run or not model:
+            input_graphs = [
+                self._build_input_graph(head_relations, sample_graph, model)
+                .expand_aliases(aliases)
+                .sort()
+                if head_relations is not None
+                else None
+                for head_relations, aliases in zip(text_head_relations, text_aliases)
+            ]
+            return with_trace(input_graphs, trace, return_trace)
+
+        batch_head_relations = set()
+
+        for head_relations in text_head_relations:
+            if head_relations is not None:
+                batch_head_relations.update(head_relations)
+
+        if not batch_head_relations:
+            return with_trace([None] * len(texts), trace, return_trace)
+
+        input_graph = self._build_input_graph(batch_head_relations, sample_graph, model)
+        batch_output_graph = self._generate(
+            model, input_graph, model_args, trace, cache
+        )
+
+        sample_keys = set()
+
+        if sample_graph:
+            sample_keys = {(kg.head, kg.relation) for kg in sample_graph}
+
+        output_graphs = []
+
+        for idx, head_relations in enumerate(text_head_relations):
+            if head_relations is None:
+                output_graphs.append(None)
+                continue
+
+            keys = sample_keys.union(head_relations)
+            output_graph = KnowledgeGraph(
+                [
+                    kg.copy()
+                    for kg in batch_output_graph
+                    if (kg.head, kg.relation) in keys
+                ]
+            )
+            output_graph = output_graph.expand_aliases(text_aliases[idx])
+            context = contexts[idx] if contexts else None
+            linker = self._get_linker(context, linker)
+            output_graphs.append(
+                self._postprocess(output_graph, context, linker, threshold, trace)
+            )
+
+        return with_trace(output_graphs, trace, return_trace)
+
+    def infer_stream(
+        self,
+        text: Optional[str] = None,
+        model: Optional[KnowledgeModel] = None,
+        heads: Optional[List[str]] = None,
+        model_args: Optional[dict] = None,
+        extract_heads: bool = True,
+        match_relations: bool = True,
+        relations: Optional[List[KnowledgeRelation]] = None,
+        dry_run: bool = False,
+        sample_graph: Optional[KnowledgeGraph] = None,
+        context: Optional[Union[List[str], str]] = None,
+        linker: Optional[KnowledgeLinker] = None,
+        threshold: float = 0.5,
+        canonicalize_heads: bool = False,
+        batch_size: int = 64,
+        cache: Optional[GenerationCache] = None,
+        trace: Optional[InferenceTrace] = None,
+    ) -> Iterator[KnowledgeGraph]:
+        """Make commonsense inferences and stream them as they are generated.
+        Head-relation pairs are split into chunks of ``batch_size`` and each chunk is generated,
+        filtered by context (if given), cleaned and sorted on its own, so that consumers can start
+        working on the first results without waiting for the full graph.
+        Arguments are the same as in :meth:`CommonsenseInference.infer`.
+
+        Args:
+            batch_size (int, optional): Number of head-relation pairs to generate per chunk. Defaults to 64.
+            canonicalize_heads (bool, optional): Whether to merge equivalent heads before relation matching.
+                                                 Defaults to False.
+            cache (Optional[GenerationCache], optional): Generation cache to use. Defaults to None.
+            trace (Optional[InferenceTrace], optional): Inference trace to record per-stage timings and
+                                                        counters into while streaming. Defaults to None.
+
+        Yields:
+            KnowledgeGraph: Inferred knowledge graph chunk.
+        """
+        model_args = model_args or {}
+        trace = trace if trace is not None else InferenceTrace()
+        text = self._validate_input(text, heads, relations)
+
+        if not text and not heads:
+            warnings.warn("Skipping inference, no text or head provided")
+            return
+
+        with trace.stage("head_extraction"):
+            kg_heads, aliases = self._collect_canonical_heads(
+                text, heads, extract_heads, canonicalize_heads
+            )
+
+        trace.count_heads(kg_heads, aliases)
+
+        if not kg_heads:
+            warnings.warn("Skipping inference, no heads found.")
+            return
+
+        with trace.stage("relation_matching"):
+            head_relations = sorted(
+                self._match_relations(
+                    kg_heads, match_relations, relations, sample_graph
+                ),
+                key=lambda head_relation: (
+                    head_relation[0].text,
+                    RELATION_SIZE.get(head_relation[1].text, 0),
+                ),
+                reverse=True,
+            )
+
+        trace.count("head_relations", len(head_relations))
+
+        if dry_run or not model:
+            for index, head_relation_chunk in enumerate(
+                chunks(head_relations, batch_size)
+            ):
+                yield self._build_input_graph(
+                    head_relation_chunk,
+                    _chunk_samples(index, sample_graph, model),
+                    model,
+                ).expand_aliases(aliases).sort()
+            return
+
+        linker = self._get_linker(context, linker)
+
+        for _, output_graph in self._generate_chunks(
+            model, head_relations, sample_graph, model_args, trace, cache, batch_size
+        ):
+            output_graph = self._postprocess(
+                output_graph.expand_aliases(aliases),
+                context,
+                linker,
+                threshold,
+                trace,
+            )
+
+            if len(output_graph) > 0:
+                yield output_graph
+
+    async def ainfer(
+        self,
+        text: Optional[str] = None,
+        model: Optional[KnowledgeModel] = None,
+        heads: Optional[List[str]] = None,
+        model_args: Optional[dict] = None,
+        extract_heads: bool = True,
+        match_relations: bool = True,
+        relations: Optional[List[KnowledgeRelation]] = None,
+        dry_run: bool = False,
+        sample_graph: Optional[KnowledgeGraph] = None,
+        context: Optional[Union[List[str], str]] = None,
+        linker: Optional[KnowledgeLinker] = None,
+        threshold: float = 0.5,
+        canonicalize_heads: bool = False,
+        executor: Optional[Executor] = None,
+        stage_executors: Optional[Dict[str, Executor]] = None,
+        cache: Optional[GenerationCache] = None,
+        return_trace: bool = False,
+    ) -> Union[KnowledgeGraph, Tuple[KnowledgeGraph, InferenceTrace]]:
+        """Make commonsense inferences without blocking the event loop.
+        Head extraction, relation matching, generation and linking are offloaded to executors,
+        so that an asyncio service can keep many requests in flight.
+        Arguments are the same as in :meth:`CommonsenseInference.infer`.
+        Process executors have to be an :class:`InferenceProcessPool` of this inference module,
+        which loads the module, the model and the linker once per worker process, so that stages only
+        send their own arguments to the workers. Each worker keeps its own copy of the head cache.
+        The generation cache would be copied for every call and never updated, so generation has to run
+        in a thread executor when it is set.
+
+        Args:
+            executor (Optional[Executor], optional): Executor to run all stages in.
+                Defaults to None, i.e. the default executor of the running loop.
+            stage_executors (Optional[Dict[str, Executor]], optional): Executors for individual stages
+                which take precedence over ``executor``. Available stages:
+                extraction, matching, generation, linking. Defaults to None.
+            cache (Optional[GenerationCache], optional): Generation cache to use. Defaults to None.
+            return_trace (bool, optional): Whether to return the inference trace with per-stage timings
+                                            and counters. Defaults to False.
+            canonicalize_heads (bool, optional): Whether to merge equivalent heads before relation matching.
+                                                 Defaults to False.
+
+        Raises:
+            ValueError: if an unknown stage is given in ``stage_executors``, a process executor is not
+                        an :class:`InferenceProcessPool` of this module with the given model and linker
+                        or the generation cache is set and generation runs in a process executor
+
+        Returns:
+            Union[KnowledgeGraph, Tuple[KnowledgeGraph, InferenceTrace]]: Inferred knowledge graph
+            and optionally, the inference trace.
+        """
+        loop = asyncio.get_running_loop()
+        model_args = model_args or {}
+        trace = InferenceTrace()
+        stage_executors = stage_executors or {}
+
+        if not set(stage_executors).issubset(INFERENCE_STAGES):
+            raise ValueError(
+                f"Unknown inference stages: {set(stage_executors) - set(INFERENCE_STAGES)}"
+            )
+
+        process_stages = {
+            stage
+            for stage in INFERENCE_STAGES
+            if isinstance(stage_executors.get(stage, executor), ProcessPoolExecutor)
+        }
+
+        for stage in process_stages:
+            pool = stage_executors.get(stage, executor)
+
+            # Sending the inference module, the model or the linker with every call would copy all of them
+            if not isinstance(pool, InferenceProcessPool) or pool.inference is not self:
+                raise ValueError(
+                    "Process executors should be an InferenceProcessPool of this inference module"
+                )
+
+            if stage == "generation" and not dry_run and model is not pool.model:
+                raise ValueError("Model is not loaded in the InferenceProcessPool")
+
+            if stage == "linking" and linker is not None and linker is not pool.linker:
+                raise ValueError("Linker is not loaded in the InferenceProcessPool")
+
+        # Copies of the cache in worker processes would never update the original
+        if cache is not None and "generation" in process_stages:
+            raise ValueError("Generation cache cannot be used with a process executor")
+
+        def run_stage(stage, func, worker_func):
+            # Worker functions are module level and only get the arguments of their stage
+            return loop.run_in_executor(
+                stage_executors.get(stage, executor),
+                worker_func if stage in process_stages else func,
+            )
+
+        text = self._validate_input(text, heads, relations)
+
+        if not text and not heads:
+            warnings.warn("Skipping inference, no text or head provided")
+            return with_trace(None, trace, return_trace)
+
+        with trace.stage("head_extraction"):
+            args = (text, heads, extract_heads, canonicalize_heads)
+            kg_heads, aliases = await run_stage(
+                "extraction",
+                partial(self._collect_canonical_heads, *args),
+                partial(_run_in_worker, "_collect_canonical_heads", *args),
+            )
+
+        trace.count_heads(kg_heads, aliases)
+
+        if not kg_heads:
+            warnings.warn("Skipping inference, no heads found.")
+            return with_trace(None, trace, return_trace)
+
+        with trace.stage("relation_matching"):
+            args = (kg_heads, match_relations, relations, sample_graph)
+            head_relations = await run_stage(
+                "matching",
+                partial(self._match_relations, *args),
+                partial(_run_in_worker, "_match_relations", *args),
+            )
+
+        trace.count("head_relations", len(head_relations))
+        input_graph = self._build_input_graph(head_relations, sample_graph, model)
+
+        if dry_run or not model:
+            input_graph = input_graph.expand_aliases(aliases)
+            return with_trace(input_graph.sort(), trace, return_trace)
+
+        with trace.stage("generation"):
+            output_graph = await run_stage(
+                "generation",
+                partial(
+                    _generate_fn(model, cache, self.resources),
+                    input_graph,
+                    **model_args,
+                ),
+                partial(_generate_in_worker, input_graph, model_args),
+            )
+
+        output_graph = output_graph.expand_aliases(aliases)
+        num_tails = _count_tails(output_graph)
+        trace.count("generated_tails", num_tails)
+
+        with trace.stage("linking"):
+            output_graph = await run_stage(
+                "linking",
+                partial(self._link, output_graph, context, linker, threshold),
+                partial(_link_in_worker, output_graph, context, threshold),
+            )
+
+        trace.count("filtered_tails", num_tails - _count_tails(output_graph))
+
+        with trace.stage("postprocessing"):
+            output_graph.clean()
+            output_graph.sort()
+
+        return with_trace(output_graph, trace, return_trace)
+
+    def expand(
+        self,
+        graph: KnowledgeGraph,
+        model: KnowledgeModel,
+        hops: int = 1,
+        model_args: Optional[dict] = None,
+        match_relations: bool = True,
+        relations: Optional[List[KnowledgeRelation]] = None,
+        sample_graph: Optional[KnowledgeGraph] = None,
+        context: Optional[Union[List[str], str]] = None,
+        linker: Optional[KnowledgeLinker] = None,
+        threshold: float = 0.5,
+        max_heads: Optional[int] = None,
+        max_pairs: Optional[int] = None,
+        cache: Optional[GenerationCache] = None,
+        return_trace: bool = False,
+    ) -> Union[KnowledgeGraph, Tuple[KnowledgeGraph, InferenceTrace]]:
+        """Expand a knowledge graph over multiple hops by using generated tails as new heads.
+        At each hop, tails generated in the previous hop (or tails of the given graph for the first hop)
+        that were not used as heads before form the frontier. Frontier heads are matched with relations and
+        generated for in a single ``KnowledgeModel.generate()`` call.
+
+        Args:
+            graph (KnowledgeGraph): Knowledge graph to expand.
+            model (KnowledgeModel): Knowledge model to use for inference.
+            hops (int, optional): Number of hops to expand. Defaults to 1.
+            model_args (Optional[dict], optional): Custom arguments to pass to ``KnowledgeModel.generate()`` method.
+                Defaults to None.
+            match_relations (bool, optional): Whether to do smart relation matching. Defaults to True.
+            relations (Optional[List[KnowledgeRelation]], optional): Subset of relations to use for direct matching.
+                Defaults to None.
+            sample_graph (Optional[KnowledgeGraph], optional): A knowledge graph containing examples.
+                Defaults to None.
+            context (Optional[Union[List[str], str]], optional): Context text to filter knowledge of every hop
+                                                                 with. Defaults to None.
+            linker (Optional[KnowledgeLinker], optional): Knowledge linker model used for linking to given context.
+                                                            Defaults to Deberta-based linker.
+            threshold (float, optional): Relevance probability used for filtering. Defaults to 0.5.
+            max_heads (Optional[int], optional): Maximum number of frontier heads to expand per hop.
+                                                 Defaults to None.
+            max_pairs (Optional[int], optional): Maximum number of head-relation pairs to generate for
+                across all hops. Pairs of a hop are ranked as in :meth:`CommonsenseInference.infer`.
+                Defaults to None.
+            cache (Optional[GenerationCache], optional): Generation cache to use. Defaults to None.
+            return_trace (bool, optional): Whether to return the inference trace with per-stage timings
+                                            and counters accumulated over all hops. Defaults to False.
+
+        Raises:
+            ValueError: if hops, max_heads or max_pairs are not positive
+
+        Returns:
+            Union[KnowledgeGraph, Tuple[KnowledgeGraph, InferenceTrace]]: Given graph together with
+            the knowledge of all hops and optionally, the inference trace. If any frontier head or pair
+            was dropped because of a budget, graph is marked as ``truncated``.
+        """
+        if hops < 1:
+            raise ValueError("Number of hops should be positive")
+
+        if max_heads is not None and max_heads < 1:
+            raise ValueError("Maximum number of heads should be positive")
+
+        if max_pairs is not None and max_pairs < 1:
+            raise ValueError("Maximum number of pairs should be positive")
+
+        self._validate_input(None, None, relations)
         model_args = model_args or {}
+        trace = InferenceTrace()
+        linker = self._get_linker(context, linker)
+        expanded_heads = {kg.head.text.strip().lower() for kg in graph}
+        kg_list = list(graph)
+        hop_graph = graph
+        remaining_pairs = max_pairs
+        truncated = False
+
+        for _ in range(hops):
+            frontier = []
+            frontier_texts = set()
+
+            for kg in hop_graph:
+                for tail in kg.tails:
+                    head_text = tail.strip().lower()
+                    # Models generate "none" for relations that do not apply
+                    if (
+                        head_text
+                        and head_text != "none"
+                        and head_text not in expanded_heads
+                        and head_text not in frontier_texts
+                    ):
+                        frontier_texts.add(head_text)
+                        frontier.append(KnowledgeHead(text=tail))
+
+            if max_heads is not None and len(frontier) > max_heads:
+                frontier = frontier[:max_heads]
+                truncated = True
+
+            # Heads dropped by the budget can still be expanded if a later hop generates them again
+            expanded_heads.update(head.text.strip().lower() for head in frontier)
+
+            trace.count("heads", len(frontier))
+
+            if not frontier:
+                break
+
+            with trace.stage("relation_matching"):
+                head_relations = self._match_relations(
+                    frontier, match_relations, relations, sample_graph
+                )
+
+            if remaining_pairs is not None:
+                head_relations = rank_head_relations(head_relations)
+
+                if len(head_relations) > remaining_pairs:
+                    trace.count("skipped_pairs", len(head_relations) - remaining_pairs)
+                    head_relations = head_relations[:remaining_pairs]
+                    truncated = True
+
+                remaining_pairs -= len(head_relations)
+
+            trace.count("head_relations", len(head_relations))
+
+            if not head_relations:
+                break
+
+            input_graph = self._build_input_graph(head_relations, sample_graph, model)
+            output_graph = self._generate(model, input_graph, model_args, trace, cache)
+            keys = set(head_relations)
+            hop_graph = self._postprocess(
+                KnowledgeGraph(
+                    [kg for kg in output_graph if (kg.head, kg.relation) in keys]
+                ),
+                context,
+                linker,
+                threshold,
+                trace,
+            )
+            kg_list.extend(hop_graph)
 
+            if remaining_pairs == 0:
+                break
+
+        return with_trace(
+            KnowledgeGraph(kg_list, truncated=truncated), trace, return_trace
+        )
+
+    def _validate_input(
+        self,
+        text: Optional[str],
+        heads: Optional[List[str]],
+        relations: Optional[List[KnowledgeRelation]],
+    ) -> Optional[str]:
         if relations is not None and not isinstance(relations, list):
             raise ValueError("Relation subset should be a list")
 
@@ -136,9 +897,19 @@ class CommonsenseInference:
             if not isinstance(heads, list):
                 raise ValueError("Heads should be a list")
 
-        if not text and not heads:
-            warnings.warn("Skipping inference, no text or head provided")
-            return None
+        return text
+
+    def _collect_heads(
+        self,
+        text: Optional[str],
+        heads: Optional[List[str]],
+        extract_heads: bool,
+        doc: Optional[Doc] = None,
+        window_size: Optional[int] = None,
+        max_heads: Optional[int] = None,
+    ) -> List[KnowledgeHead]:
+        kg_heads = []
+        head_texts = set()
 
         if heads:
             for head in heads:
@@ -147,39 +918,142 @@ class CommonsenseInference:
                     kg_heads.append(KnowledgeHead(text=head))
 
         if extract_heads:
-            if text.strip():
-                print("Extracting knowledge heads...")
-                for head_proc in self._head_processors.values():
-                    extracted_heads = head_proc.extract(text)
-                    for head in extracted_heads:
-                        head_text = head.text.strip().lower()
-                        # Check for duplication
-                        if head_text not in head_texts:
-                            kg_heads.append(head)
-                            head_texts.add(head_text)
+            if text:
+                extracted_heads = self._extract_heads(text, doc, window_size, max_heads)
+            else:
+                extracted_heads = []
+
+            num_extracted = 0
+
+            for extracted_heads in extracted_heads:
+                for head in extracted_heads:
+                    if max_heads is not None and num_extracted >= max_heads:
+                        break
+
+                    head_text = head.text.strip().lower()
+                    # Check for duplication
+                    if head_text not in head_texts:
+                        kg_heads.append(head)
+                        head_texts.add(head_text)
+                        num_extracted += 1
         else:
-            if text and text.strip() not in head_texts:
+            if text and text not in head_texts:
                 head_texts.add(text)
                 kg_heads.append(KnowledgeHead(text=text))
 
-        if not kg_heads:
-            warnings.warn("Skipping inference, no heads found.")
-            return None
+        return kg_heads
+
+    def _extract_heads(
+        self,
+        text: str,
+        doc: Optional[Doc],
+        window_size: Optional[int],
+        max_heads: Optional[int],
+    ) -> List[List[KnowledgeHead]]:
+        cache_key = None
 
-        base_relation_matcher = BaseRelationMatcher("base-relation-matcher")
+        if self.head_cache is not None and doc is None:
+            cache_key = (
+                self.language,
+                # Heads refer to character offsets and the id of the parsed text, so the text is not normalized
+                text,
+                # Extractors with the same names can be configured differently in instances sharing the cache
+                tuple(self._head_processors.values()),
+                window_size,
+                max_heads,
+            )
+            cached_heads = self.head_cache.get(cache_key)
+
+            if cached_heads is not None:
+                # Cached heads are shared across calls, so they are copied before use
+                return [[head.copy() for head in heads] for heads in cached_heads]
+
+        if window_size is not None and doc is None:
+            extracted_heads = [self._extract_window_heads(text, window_size, max_heads)]
+        else:
+            # Parse only once and share the doc across all extractors
+            if doc is None:
+                doc = self.nlp(text, disable=self._disabled_components)
+            extracted_heads = [
+                head_proc.extract(text, doc)
+                for head_proc in self._head_processors.values()
+            ]
+
+        if cache_key is not None:
+            self.head_cache.set(
+                cache_key,
+                [[head.copy() for head in heads] for heads in extracted_heads],
+            )
+
+        return extracted_heads
+
+    def _extract_window_heads(
+        self, text: str, window_size: int, max_heads: Optional[int]
+    ) -> List[KnowledgeHead]:
+        # Windows are parsed lazily and freed once their heads are extracted
+        docs = self.nlp.pipe(
+            split_windows(text, window_size),
+            batch_size=DEFAULT_WINDOW_BATCH_SIZE,
+            disable=self._disabled_components,
+        )
+        return merge_window_heads(
+            (
+                [
+                    head
+                    for head_proc in self._head_processors.values()
+                    for head in head_proc.extract(window_doc.text, window_doc)
+                ]
+                for window_doc in docs
+            ),
+            max_heads=max_heads,
+        )
+
+    def _collect_canonical_heads(
+        self,
+        text: Optional[str],
+        heads: Optional[List[str]],
+        extract_heads: bool,
+        canonicalize_heads: bool,
+        doc: Optional[Doc] = None,
+        window_size: Optional[int] = None,
+        max_heads: Optional[int] = None,
+    ) -> Tuple[List[KnowledgeHead], Dict[KnowledgeHead, List[KnowledgeHead]]]:
+        kg_heads = self._collect_heads(
+            text,
+            heads,
+            extract_heads,
+            doc=doc,
+            window_size=window_size,
+            max_heads=max_heads,
+        )
+
+        if canonicalize_heads:
+            # Head entities carry the lemmas of the parsed doc, so there is no need to parse again
+            return merge_heads(kg_heads)
+
+        return kg_heads, {}
+
+    def _match_relations(
+        self,
+        kg_heads: List[KnowledgeHead],
+        match_relations: bool,
+        relations: Optional[List[KnowledgeRelation]],
+        sample_graph: Optional[KnowledgeGraph],
+    ) -> Set[Tuple[KnowledgeHead, KnowledgeRelation]]:
+        head_relations = set()
 
         if match_relations:
-            print("Matching knowledge heads with relations...")
-            for relation_proc in self._relation_processors.values():
-                head_relations = head_relations.union(
-                    set(
-                        relation_proc.match(
-                            kg_heads, relations, sample_graph=sample_graph
+            with self._use_resources("relation_matcher"):
+                for relation_proc in self._relation_processors.values():
+                    head_relations = head_relations.union(
+                        set(
+                            relation_proc.match(
+                                kg_heads, relations, sample_graph=sample_graph
+                            )
                         )
                     )
-                )
         else:
-            print("Pairing knowledge heads with all relations...")
+            base_relation_matcher = BaseRelationMatcher("base-relation-matcher")
             head_relations = head_relations.union(
                 set(
                     base_relation_matcher.match(
@@ -188,6 +1062,37 @@ class CommonsenseInference:
                 )
             )
 
+        return head_relations
+
+    def _retrieve(
+        self,
+        head_relations: Iterable[Tuple[KnowledgeHead, KnowledgeRelation]],
+        reference: Union[KnowledgeGraph, KnowledgeIndex],
+    ) -> Tuple[List[Knowledge], List[Tuple[KnowledgeHead, KnowledgeRelation]]]:
+        if not isinstance(reference, KnowledgeIndex):
+            reference = KnowledgeIndex(reference)
+
+        retrieved_kgs = []
+        remaining_head_relations = []
+
+        for head, relation in head_relations:
+            tails = reference.lookup(head, relation)
+
+            if tails is None:
+                remaining_head_relations.append((head, relation))
+            else:
+                retrieved_kgs.append(
+                    Knowledge(head=head, relation=relation, tails=tails)
+                )
+
+        return retrieved_kgs, remaining_head_relations
+
+    def _build_input_graph(
+        self,
+        head_relations: Iterable[Tuple[KnowledgeHead, KnowledgeRelation]],
+        sample_graph: Optional[KnowledgeGraph],
+        model: Optional[KnowledgeModel],
+    ) -> KnowledgeGraph:
         kg_list = []
 
         for head_relation in head_relations:
@@ -198,31 +1103,117 @@ class CommonsenseInference:
 
         if sample_graph:
             input_graph = input_graph + sample_graph
-        else:
-            if isinstance(model, GPT3Zeroshot):
-                warnings.warn(
-                    "Sample graph not found, but recommended for good performance with GPT-3 based inference."
+        elif _is_gpt3(model):
+            warnings.warn(
+                "Sample graph not found, but recommended for good performance with GPT-3 based inference."
+            )
+
+        return input_graph
+
+    def _get_linker(
+        self,
+        context: Optional[Union[List[str], str]],
+        linker: Optional[KnowledgeLinker],
+    ) -> Optional[KnowledgeLinker]:
+        if context and not linker:
+            from kogito.linkers.deberta import DebertaLinker
+
+            linker = DebertaLinker()
+        return linker
+
+    def _generate(
+        self,
+        model: KnowledgeModel,
+        input_graph: KnowledgeGraph,
+        model_args: dict,
+        trace: InferenceTrace,
+        cache: Optional[GenerationCache] = None,
+    ) -> KnowledgeGraph:
+        with trace.stage("generation"):
+            output_graph = _generate_fn(model, cache, self.resources)(
+                input_graph, **model_args
+            )
+
+        trace.count("generated_tails", _count_tails(output_graph))
+
+        return output_graph
+
+    def _generate_chunks(
+        self,
+        model: KnowledgeModel,
+        head_relations: List[Tuple[KnowledgeHead, KnowledgeRelation]],
+        sample_graph: Optional[KnowledgeGraph],
+        model_args: dict,
+        trace: InferenceTrace,
+        cache: Optional[GenerationCache],
+        batch_size: int,
+        deadline: Optional[float] = None,
+    ) -> Iterator[Tuple[List[Tuple[KnowledgeHead, KnowledgeRelation]], KnowledgeGraph]]:
+        generation_time = 0.0
+        num_pairs = 0
+
+        for index, head_relation_chunk in enumerate(chunks(head_relations, batch_size)):
+            if deadline is not None:
+                now = time.perf_counter()
+                # Estimate the time of the next chunk from the generation rate so far
+                estimate = (
+                    generation_time / num_pairs * len(head_relation_chunk)
+                    if num_pairs
+                    else 0.0
                 )
+                if now + estimate > deadline:
+                    return
 
-        if dry_run or not model:
-            return input_graph.sort()
+            chunk_start = time.perf_counter()
+            input_graph = self._build_input_graph(
+                head_relation_chunk, _chunk_samples(index, sample_graph, model), model
+            )
+            output_graph = self._generate(model, input_graph, model_args, trace, cache)
+            generation_time += time.perf_counter() - chunk_start
+            num_pairs += len(head_relation_chunk)
 
-        print("Generating knowledge graph...")
-        output_graph = model.generate(input_graph, **model_args)
+            yield head_relation_chunk, output_graph
 
+    def _link(
+        self,
+        output_graph: KnowledgeGraph,
+        context: Optional[Union[List[str], str]],
+        linker: Optional[KnowledgeLinker],
+        threshold: float,
+    ) -> KnowledgeGraph:
         if context:
-            if not linker:
-                print("Loading default Deberta linker for filtering...")
-                linker = DebertaLinker()
+            linker = self._get_linker(context, linker)
+            with self._use_resources("linker"):
+                output_graph = linker.filter(output_graph, context, threshold=threshold)
+
+        return output_graph
+
+    def _postprocess(
+        self,
+        output_graph: KnowledgeGraph,
+        context: Optional[Union[List[str], str]],
+        linker: Optional[KnowledgeLinker],
+        threshold: float,
+        trace: InferenceTrace,
+    ) -> KnowledgeGraph:
+        num_tails = _count_tails(output_graph)
+
+        with trace.stage("linking"):
+            output_graph = self._link(output_graph, context, linker, threshold)
 
-            print("Filtering knowledge graph based on the context...")
-            output_graph = linker.filter(output_graph, context, threshold=threshold)
+        trace.count("filtered_tails", num_tails - _count_tails(output_graph))
 
-        output_graph.clean()
-        output_graph.sort()
+        with trace.stage("postprocessing"):
+            output_graph.clean()
+            output_graph.sort()
 
         return output_graph
 
+    def _use_resources(self, component: str) -> ContextManager:
+        if self.resources is None:
+            return nullcontext()
+        return self.resources.use(component)
+
     def add_processor(
         self, processor: Union[KnowledgeHeadExtractor, KnowledgeRelationMatcher]
     ) -> None:
@@ -237,6 +1228,8 @@ class CommonsenseInference:
         if isinstance(processor, KnowledgeHeadExtractor):
             self._head_processors[processor.name] = processor
             processor.lang = self.nlp
+            self._update_language_profile()
+            self._clear_head_cache()
         elif isinstance(processor, KnowledgeRelationMatcher):
             self._relation_processors[processor.name] = processor
             processor.lang = self.nlp
@@ -251,5 +1244,142 @@ class CommonsenseInference:
         """
         if processor_name in self._head_processors:
             del self._head_processors[processor_name]
+            self._update_language_profile()
+            self._clear_head_cache()
         elif processor_name in self._relation_processors:
             del self._relation_processors[processor_name]
+
+    def _clear_head_cache(self) -> None:
+        if self.head_cache is not None:
+            self.head_cache.clear()
+
+    def _update_language_profile(self) -> None:
+        # Parse only with the spacy components needed by the active head extractors
+        requirements = merge_requirements(
+            head_proc.language_requirements
+            for head_proc in self._head_processors.values()
+        )
+        self._disabled_components = profile_disable(self.nlp, requirements)
+
+
+class InferenceProcessPool(ProcessPoolExecutor):
+    """
+    Process executor for :meth:`CommonsenseInference.ainfer`.
+    The inference module, the model and the linker are copied to every worker process once,
+    when the worker starts, so that inference stages only send their own arguments to the workers.
+    """
+
+    def __init__(
+        self,
+        inference: CommonsenseInference,
+        model: Optional[KnowledgeModel] = None,
+        linker: Optional[KnowledgeLinker] = None,
+        max_workers: Optional[int] = None,
+        mp_context: Optional[Any] = None,
+    ) -> None:
+        """Initialize an inference process pool
+
+        Args:
+            inference (CommonsenseInference): Inference module to load in the workers.
+                Later changes to it (e.g. added processors) are not seen by running workers.
+            model (Optional[KnowledgeModel], optional): Knowledge model to load in the workers. Defaults to None.
+            linker (Optional[KnowledgeLinker], optional): Knowledge linker to load in the workers.
+                Defaults to None, i.e. the default linker is loaded by each worker on first use.
+            max_workers (Optional[int], optional): Maximum number of worker processes.
+                                                   Defaults to the number of CPUs.
+            mp_context (Optional[Any], optional): Multiprocessing context to start workers with.
+                                                  Defaults to None.
+        """
+        super().__init__(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(inference, model, linker),
+        )
+        self.inference = inference
+        self.model = model
+        self.linker = linker
+
+
+# State of an InferenceProcessPool worker process
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(
+    inference: CommonsenseInference,
+    model: Optional[KnowledgeModel],
+    linker: Optional[KnowledgeLinker],
+) -> None:
+    _worker_state.update(inference=inference, model=model, linker=linker)
+
+
+def _run_in_worker(method: str, *args) -> Any:
+    return getattr(_worker_state["inference"], method)(*args)
+
+
+def _generate_in_worker(
+    input_graph: KnowledgeGraph, model_args: dict
+) -> KnowledgeGraph:
+    inference = _worker_state["inference"]
+    return _generate_fn(_worker_state["model"], None, inference.resources)(
+        input_graph, **model_args
+    )
+
+
+def _link_in_worker(
+    output_graph: KnowledgeGraph,
+    context: Optional[Union[List[str], str]],
+    threshold: float,
+) -> KnowledgeGraph:
+    inference = _worker_state["inference"]
+
+    if context and _worker_state["linker"] is None:
+        # Default linker is loaded once per worker
+        _worker_state["linker"] = inference._get_linker(context, None)
+
+    return inference._link(output_graph, context, _worker_state["linker"], threshold)
+
+
+def _generate_fn(
+    model: KnowledgeModel,
+    cache: Optional[GenerationCache],
+    resources: Optional[ResourceConfig] = None,
+) -> Callable[..., KnowledgeGraph]:
+    generate = model.generate
+
+    if cache is not None:
+        generate = partial(cache.generate, model)
+
+    if resources is not None:
+        # Module level function keeps the callable picklable for process executors
+        generate = partial(_run_with_resources, resources, "model", generate)
+
+    return generate
+
+
+def _run_with_resources(
+    resources: ResourceConfig, component: str, func: Callable, *args, **kwargs
+) -> Any:
+    with resources.use(component):
+        return func(*args, **kwargs)
+
+
+def _chunk_samples(
+    index: int, sample_graph: Optional[KnowledgeGraph], model: Optional[KnowledgeModel]
+) -> Optional[KnowledgeGraph]:
+    # Samples are generated like any other knowledge, so only the first chunk needs them.
+    # GPT-3 uses them as examples in the prompt of every chunk and does not return them.
+    if index == 0 or _is_gpt3(model):
+        return sample_graph
+    return None
+
+
+def _is_gpt3(model: KnowledgeModel) -> bool:
+    # GPT-3 model module is never imported unless the model is in use,
+    # so there is no need to import openai just for the type check
+    zeroshot = sys.modules.get("kogito.models.gpt3.zeroshot")
+    return zeroshot is not None and isinstance(model, zeroshot.GPT3Zeroshot)
+
+
+def _count_tails(graph: KnowledgeGraph) -> int:
+    return sum(len(kg.tails) for kg in graph)
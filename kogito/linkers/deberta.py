@@ -1,11 +1,11 @@
 from typing import Union, List
 import itertools
 from transformers import DebertaV2ForSequenceClassification, DebertaV2Tokenizer
-import spacy
 import torch
 
 from kogito.core.linker import KnowledgeLinker
 from kogito.core.knowledge import KnowledgeGraph
+from kogito.core.language import get_language
 from kogito.core.utils import truncate_sequences_dual, pad_ids
 from kogito.core.relation import RELATION_TO_NL
 
@@ -33,7 +33,8 @@ class DebertaLinker(KnowledgeLinker):
         self.pad_token_id = self.tokenizer.convert_tokens_to_ids(
             self.tokenizer.pad_token
         )
-        self.nlp = spacy.load(language, exclude=["ner"])
+        # Context is only split into sentences
+        self.nlp = get_language(language, {"sentences"})
         self.max_input_tokens = 512
         self.model.to(device)
 
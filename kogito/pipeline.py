@@ -0,0 +1,311 @@
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+import itertools
+import queue
+import threading
+import warnings
+
+from kogito.core.knowledge import KnowledgeGraph
+from kogito.core.linker import KnowledgeLinker
+from kogito.core.model import KnowledgeModel
+from kogito.core.relation import KnowledgeRelation
+from kogito.core.cache import GenerationCache
+from kogito.core.trace import InferenceTrace
+from kogito.inference import CommonsenseInference
+
+#: Stages of the inference pipeline, each running in its own thread
+PIPELINE_STAGES = ["extraction", "matching", "generation", "linking"]
+
+# Marks the end of the input stream
+_END = object()
+
+# Interval in seconds to check whether the pipeline was stopped while waiting on a queue
+_POLL_INTERVAL = 0.1
+
+
+class _PipelineItem:
+    """State of a single text while it moves through the pipeline"""
+
+    __slots__ = [
+        "text",
+        "context",
+        "trace",
+        "heads",
+        "aliases",
+        "head_relations",
+        "graph",
+        "done",
+        "error",
+    ]
+
+    def __init__(self, text: Optional[str], context: Any = None) -> None:
+        self.text = text
+        self.context = context
+        self.trace = InferenceTrace()
+        self.heads = None
+        self.aliases = None
+        self.head_relations = None
+        self.graph = None
+        self.done = False
+        self.error = None
+
+
+class InferencePipeline:
+    """
+    Pipelined commonsense inference over a stream of texts.
+    Head extraction, relation matching, generation and linking run in their own threads connected by
+    bounded queues, so that e.g. parsing of the next text overlaps with the generation of the current one,
+    while the queues keep the number of texts in flight bounded.
+    """
+
+    def __init__(
+        self,
+        inference: CommonsenseInference,
+        model: Optional[KnowledgeModel] = None,
+        heads: Optional[List[str]] = None,
+        model_args: Optional[dict] = None,
+        extract_heads: bool = True,
+        match_relations: bool = True,
+        relations: Optional[List[KnowledgeRelation]] = None,
+        dry_run: bool = False,
+        sample_graph: Optional[KnowledgeGraph] = None,
+        linker: Optional[KnowledgeLinker] = None,
+        threshold: float = 0.5,
+        canonicalize_heads: bool = False,
+        cache: Optional[GenerationCache] = None,
+        max_queue_size: int = 8,
+    ) -> None:
+        """Initialize an inference pipeline.
+        Arguments are the same as in :meth:`kogito.inference.CommonsenseInference.infer`.
+
+        Args:
+            inference (CommonsenseInference): Inference module to use for head extraction and relation matching.
+            max_queue_size (int, optional): Maximum number of texts waiting between two stages. Defaults to 8.
+
+        Raises:
+            ValueError: if max_queue_size is not positive or relations argument is not of type list
+        """
+        if max_queue_size <= 0:
+            raise ValueError("Queue size should be positive")
+
+        if relations is not None and not isinstance(relations, list):
+            raise ValueError("Relation subset should be a list")
+
+        self.inference = inference
+        self.model = model
+        self.heads = heads
+        self.model_args = model_args or {}
+        self.extract_heads = extract_heads
+        self.match_relations = match_relations
+        self.relations = relations
+        self.dry_run = dry_run
+        self.sample_graph = sample_graph
+        self.linker = linker
+        self.threshold = threshold
+        self.canonicalize_heads = canonicalize_heads
+        self.cache = cache
+        self.max_queue_size = max_queue_size
+        # Default linker for texts with a context, loaded once on first use
+        self._default_linker = None
+
+    def run(
+        self,
+        texts: Iterable[str],
+        contexts: Optional[Iterable[Optional[Union[List[str], str]]]] = None,
+        return_trace: bool = False,
+    ) -> Iterator[
+        Union[Optional[KnowledgeGraph], Tuple[Optional[KnowledgeGraph], InferenceTrace]]
+    ]:
+        """Run the pipeline over a stream of texts. Texts are consumed lazily as the pipeline has room for them.
+
+        Args:
+            texts (Iterable[str]): Texts to extract commonsense inferences from.
+            contexts (Optional[Iterable[Optional[Union[List[str], str]]]], optional): Context for each text,
+                in the same order as ``texts``. Defaults to None.
+            return_trace (bool, optional): Whether to yield the inference trace of each text as well.
+                                            Defaults to False.
+
+        Raises:
+            Exception: Any exception raised by a stage is re-raised here for the text that caused it
+            RuntimeError: if a pipeline thread stops without passing on the end of the input stream
+
+        Yields:
+            Union[Optional[KnowledgeGraph], Tuple[Optional[KnowledgeGraph], InferenceTrace]]: Inferred knowledge
+            graph for each text in the input order or None if inference was skipped for that text
+            and optionally, its inference trace.
+        """
+        stop = threading.Event()
+        stages = [self._extract, self._match, self._generate, self._link]
+        queues = [
+            queue.Queue(maxsize=self.max_queue_size) for _ in range(len(stages) + 1)
+        ]
+        # Set by each thread when it returns normally, i.e. after passing on the end of the stream
+        completed = [False] * (len(stages) + 1)
+        threads = [
+            threading.Thread(
+                target=_run_thread,
+                args=(completed, 0, self._feed, texts, contexts, queues[0], stop),
+                daemon=True,
+            )
+        ]
+
+        for index, stage in enumerate(stages):
+            threads.append(
+                threading.Thread(
+                    target=_run_thread,
+                    args=(
+                        completed,
+                        index + 1,
+                        self._run_stage,
+                        stage,
+                        queues[index],
+                        queues[index + 1],
+                        stop,
+                    ),
+                    name=f"kogito-{PIPELINE_STAGES[index]}",
+                    daemon=True,
+                )
+            )
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                try:
+                    item = queues[-1].get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    # A thread that died without passing on the end of the stream would block iteration forever
+                    if any(
+                        not thread.is_alive() and not completed[index]
+                        for index, thread in enumerate(threads)
+                    ):
+                        raise RuntimeError("Pipeline thread stopped unexpectedly")
+                    continue
+
+                if item is _END:
+                    break
+
+                if item.error is not None:
+                    raise item.error
+
+                yield (item.graph, item.trace) if return_trace else item.graph
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _feed(
+        self,
+        texts: Iterable[str],
+        contexts: Optional[Iterable[Optional[Union[List[str], str]]]],
+        out_queue: queue.Queue,
+        stop: threading.Event,
+    ) -> None:
+        contexts = itertools.repeat(None) if contexts is None else contexts
+
+        try:
+            for text, context in zip(texts, contexts):
+                if not _put(out_queue, _PipelineItem(text, context), stop):
+                    return
+        except Exception as e:
+            item = _PipelineItem(None)
+            item.error = e
+            _put(out_queue, item, stop)
+
+        _put(out_queue, _END, stop)
+
+    def _run_stage(
+        self,
+        stage: Callable[[_PipelineItem], None],
+        in_queue: queue.Queue,
+        out_queue: queue.Queue,
+        stop: threading.Event,
+    ) -> None:
+        while not stop.is_set():
+            try:
+                item = in_queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            if item is not _END and not item.done and item.error is None:
+                try:
+                    stage(item)
+                except Exception as e:
+                    item.error = e
+
+            if not _put(out_queue, item, stop) or item is _END:
+                return
+
+    def _extract(self, item: _PipelineItem) -> None:
+        text = self.inference._validate_input(item.text, self.heads, self.relations)
+
+        if not text and not self.heads:
+            warnings.warn("Skipping inference, no text or head provided")
+            item.done = True
+            return
+
+        with item.trace.stage("head_extraction"):
+            item.heads, item.aliases = self.inference._collect_canonical_heads(
+                text, self.heads, self.extract_heads, self.canonicalize_heads
+            )
+
+        item.trace.count_heads(item.heads, item.aliases)
+
+        if not item.heads:
+            warnings.warn("Skipping inference, no heads found.")
+            item.done = True
+
+    def _match(self, item: _PipelineItem) -> None:
+        with item.trace.stage("relation_matching"):
+            item.head_relations = self.inference._match_relations(
+                item.heads, self.match_relations, self.relations, self.sample_graph
+            )
+
+        item.trace.count("head_relations", len(item.head_relations))
+
+    def _generate(self, item: _PipelineItem) -> None:
+        input_graph = self.inference._build_input_graph(
+            item.head_relations, self.sample_graph, self.model
+        )
+
+        if self.dry_run or not self.model:
+            item.graph = input_graph.expand_aliases(item.aliases).sort()
+            item.done = True
+            return
+
+        item.graph = self.inference._generate(
+            self.model, input_graph, self.model_args, item.trace, self.cache
+        )
+
+    def _link(self, item: _PipelineItem) -> None:
+        linker = self.linker
+
+        if linker is None and item.context:
+            # Only the linking thread gets here, so the linker is loaded once
+            if self._default_linker is None:
+                self._default_linker = self.inference._get_linker(item.context, None)
+            linker = self._default_linker
+
+        item.graph = self.inference._postprocess(
+            item.graph.expand_aliases(item.aliases),
+            item.context,
+            linker,
+            self.threshold,
+            item.trace,
+        )
+
+
+def _run_thread(completed: List[bool], index: int, target: Callable, *args) -> None:
+    target(*args)
+    completed[index] = True
+
+
+def _put(out_queue: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    # Block until there is room in the queue, unless the pipeline is stopped
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
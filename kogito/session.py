@@ -0,0 +1,237 @@
+from typing import Dict, List, Optional, Set, Tuple, Union
+import bisect
+import warnings
+
+from kogito.core.head import KnowledgeHead
+from kogito.core.knowledge import Knowledge, KnowledgeGraph
+from kogito.core.linker import KnowledgeLinker
+from kogito.core.model import KnowledgeModel
+from kogito.core.relation import KnowledgeRelation, RELATION_SIZE
+from kogito.core.cache import GenerationCache
+from kogito.core.trace import InferenceTrace, with_trace
+from kogito.core.processors.head import canonical_head_key
+from kogito.inference import CommonsenseInference
+
+
+class InferenceSession:
+    """
+    Incremental commonsense inference for an evolving document or conversation.
+    The session keeps heads and generated knowledge of earlier texts, so that for newly added text,
+    only new heads are matched with relations and sent to the model.
+    """
+
+    def __init__(
+        self,
+        inference: CommonsenseInference,
+        model: KnowledgeModel,
+        model_args: Optional[dict] = None,
+        extract_heads: bool = True,
+        match_relations: bool = True,
+        relations: Optional[List[KnowledgeRelation]] = None,
+        sample_graph: Optional[KnowledgeGraph] = None,
+        linker: Optional[KnowledgeLinker] = None,
+        threshold: float = 0.5,
+        canonicalize_heads: bool = False,
+        cache: Optional[GenerationCache] = None,
+    ) -> None:
+        """Initialize an inference session.
+        Arguments are the same as in :meth:`kogito.inference.CommonsenseInference.infer`.
+
+        Args:
+            inference (CommonsenseInference): Inference module to use for head extraction and relation matching.
+            model (KnowledgeModel): Knowledge model to use for inference.
+
+        Raises:
+            ValueError: if relations argument is not of type list
+        """
+        if relations is not None and not isinstance(relations, list):
+            raise ValueError("Relation subset should be a list")
+
+        self.inference = inference
+        self.model = model
+        self.model_args = model_args or {}
+        self.extract_heads = extract_heads
+        self.match_relations = match_relations
+        self.relations = relations
+        self.sample_graph = sample_graph
+        self.linker = linker
+        self.threshold = threshold
+        self.canonicalize_heads = canonicalize_heads
+        self.cache = cache
+        self.texts: List[str] = []
+        self._head_texts: Set[str] = set()
+        self._representatives: Dict[Tuple, KnowledgeHead] = {}
+        # Knowledge by head text and relation
+        self._knowledge: Dict[str, Dict[KnowledgeRelation, Knowledge]] = {}
+        # Knowledge kept in ascending graph order, so that new knowledge is inserted without sorting again
+        self._sorted_knowledge: List[Knowledge] = []
+        self._sort_keys: List[Tuple[str, int]] = []
+        # Default linker for texts with a context, loaded once on first use
+        self._default_linker = None
+
+    @property
+    def graph(self) -> KnowledgeGraph:
+        """Combined knowledge graph of all texts added so far, sorted as by :meth:`KnowledgeGraph.sort`.
+        Knowledge instances are shared with the session and should be copied before they are modified.
+
+        Returns:
+            KnowledgeGraph: Inferred knowledge graph
+        """
+        return KnowledgeGraph(self._sorted_knowledge[::-1])
+
+    def add(
+        self,
+        text: str,
+        context: Optional[Union[List[str], str]] = None,
+        return_trace: bool = False,
+    ) -> Union[KnowledgeGraph, Tuple[KnowledgeGraph, InferenceTrace]]:
+        """Add new text to the session and make commonsense inferences for it.
+        Only the new text is parsed. Heads seen in earlier texts are skipped and knowledge is generated
+        only for new head-relation pairs.
+
+        Args:
+            text (str): New text, e.g. the next sentence of a document or the next turn of a conversation.
+            context (Optional[Union[List[str], str]], optional): Context text to filter the knowledge
+                                                                 of the new text with. Defaults to None.
+            return_trace (bool, optional): Whether to return the inference trace of the new text.
+                                            Defaults to False.
+
+        Raises:
+            ValueError: if text is not a string
+
+        Returns:
+            Union[KnowledgeGraph, Tuple[KnowledgeGraph, InferenceTrace]]: Combined knowledge graph of
+            all texts added so far and optionally, the inference trace of the new text.
+        """
+        trace = InferenceTrace()
+        text = self.inference._validate_input(text, None, self.relations)
+
+        if not text:
+            warnings.warn("Skipping inference, no text provided")
+            return with_trace(self.graph, trace, return_trace)
+
+        self.texts.append(text)
+
+        with trace.stage("head_extraction"):
+            kg_heads, aliases = self._new_heads(
+                self.inference._collect_heads(text, None, self.extract_heads)
+            )
+
+        trace.count_heads(kg_heads, aliases)
+
+        head_relations = set()
+
+        if kg_heads:
+            with trace.stage("relation_matching"):
+                head_relations = self.inference._match_relations(
+                    kg_heads, self.match_relations, self.relations, self.sample_graph
+                )
+
+        head_relations = {
+            (head, relation)
+            for head, relation in head_relations
+            if relation not in self._knowledge.get(head.text, {})
+        }
+        trace.count("head_relations", len(head_relations))
+
+        if head_relations:
+            input_graph = self.inference._build_input_graph(
+                head_relations, self.sample_graph, self.model
+            )
+            output_graph = self.inference._generate(
+                self.model, input_graph, self.model_args, trace, self.cache
+            )
+            output_graph = self.inference._postprocess(
+                KnowledgeGraph(
+                    [
+                        kg
+                        for kg in output_graph
+                        if (kg.head, kg.relation) in head_relations
+                    ]
+                ),
+                context,
+                self._get_linker(context),
+                self.threshold,
+                trace,
+            )
+
+            for kg in output_graph:
+                self._add_knowledge(kg)
+
+        # Merged heads reuse the knowledge of their representatives, including those of earlier texts
+        for representative, alias_heads in aliases.items():
+            for kg in list(self._knowledge.get(representative.text, {}).values()):
+                for alias in alias_heads:
+                    alias_kg = kg.copy()
+                    alias_kg.head = alias
+                    self._add_knowledge(alias_kg)
+
+        return with_trace(self.graph, trace, return_trace)
+
+    def clear(self) -> None:
+        """Forget all texts and knowledge of the session"""
+        self.texts = []
+        self._head_texts = set()
+        self._representatives = {}
+        self._knowledge = {}
+        self._sorted_knowledge = []
+        self._sort_keys = []
+
+    def _get_linker(
+        self, context: Optional[Union[List[str], str]]
+    ) -> Optional[KnowledgeLinker]:
+        if self.linker is not None or not context:
+            return self.linker
+
+        if self._default_linker is None:
+            self._default_linker = self.inference._get_linker(context, None)
+
+        return self._default_linker
+
+    def _add_knowledge(self, kg: Knowledge) -> None:
+        relations = self._knowledge.setdefault(kg.head.text, {})
+        key = (kg.head.text, RELATION_SIZE.get(kg.relation.text, 0))
+        old_kg = relations.get(kg.relation)
+
+        if old_kg is not None:
+            index = bisect.bisect_left(self._sort_keys, key)
+
+            while self._sorted_knowledge[index] is not old_kg:
+                index += 1
+
+            del self._sorted_knowledge[index]
+            del self._sort_keys[index]
+
+        relations[kg.relation] = kg
+        # Inserted before equal keys, so that the reversed order keeps equal knowledge in insertion order
+        index = bisect.bisect_left(self._sort_keys, key)
+        self._sorted_knowledge.insert(index, kg)
+        self._sort_keys.insert(index, key)
+
+    def _new_heads(
+        self, kg_heads: List[KnowledgeHead]
+    ) -> Tuple[List[KnowledgeHead], Dict[KnowledgeHead, List[KnowledgeHead]]]:
+        new_heads = []
+        aliases = {}
+
+        for head in kg_heads:
+            head_text = head.text.strip().lower()
+
+            if head_text in self._head_texts:
+                continue
+
+            self._head_texts.add(head_text)
+
+            if self.canonicalize_heads:
+                key = canonical_head_key(head)
+
+                if key is not None:
+                    if key in self._representatives:
+                        aliases.setdefault(self._representatives[key], []).append(head)
+                        continue
+
+                    self._representatives[key] = head
+
+            new_heads.append(head)
+
+        return new_heads, aliases